@@ -0,0 +1,89 @@
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .routers import reading_from_replica
+
+
+def _generation_key(namespace):
+    return f"list-cache:{namespace}:generation"
+
+
+def list_cache_generation(namespace):
+    """Returns the current generation of a cached list namespace."""
+    key = _generation_key(namespace)
+    # Seed from the clock so a generation lost to eviction is never reused
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def _bump(namespace):
+    key = _generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_list_cache(namespace):
+    """
+    Drops every cached page of a list namespace. The generation is bumped
+    right away and again on commit, so a reader that cached the pre-commit
+    state in between is not served afterwards.
+    """
+    _bump(namespace)
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def _if_none_match(request):
+    header = request.headers.get('If-None-Match', '')
+    return {tag.strip() for tag in header.split(',') if tag.strip()}
+
+
+class CachedListMixin:
+    """
+    Caches list responses per query string and answers conditional requests.
+
+    Entries are keyed by the namespace generation, which model signals bump on
+    every write, so one change invalidates all cached pages of the list. Each
+    response carries an ETag; a poll sending a matching If-None-Match gets a
+    304 without a body. With the default local-memory cache every worker
+    process keeps its own copy; configure a shared CACHE_BACKEND when running
+    several workers so invalidations reach all of them.
+
+    Only lists read from the primary are cached: a lagging replica's list
+    stored under the new generation would be served to everyone, including
+    clients pinned to the primary to read their own writes.
+    """
+    list_cache_namespace = None
+
+    def get_list_cache_timeout(self, data):
+        return settings.LIST_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        generation = list_cache_generation(self.list_cache_namespace)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f"list-cache:{self.list_cache_namespace}:{generation}:{path}"
+
+        cached = cache.get(key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = json.dumps(response.data, cls=JSONEncoder)
+            etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+            cached = (etag, response.data)
+            timeout = self.get_list_cache_timeout(response.data)
+            if timeout > 0 and not reading_from_replica():
+                cache.set(key, cached, timeout)
+
+        etag, data = cached
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in _if_none_match(request):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
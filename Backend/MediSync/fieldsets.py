@@ -0,0 +1,75 @@
+from rest_framework.exceptions import ValidationError
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """Lets a serializer be narrowed to some of its fields with ``fields=[...]``."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Serves a projection of the list and retrieve payloads.
+
+    ``?fields=a,b`` keeps only the named fields. Nested relations listed in
+    ``expandable_fields`` are left out of such a response unless named in
+    ``?expand=``. Without ``?fields=`` the full representation is returned.
+    The queryset is narrowed with .only() so omitted columns are not fetched;
+    computed fields declare the model fields they read in
+    ``sparse_field_dependencies``.
+    """
+    expandable_fields = ()
+    sparse_field_dependencies = {}
+
+    def get_sparse_fields(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        fields = _split(self.request.query_params.get('fields'))
+        if not fields:
+            return None
+        expand = _split(self.request.query_params.get('expand'))
+
+        readable = {
+            name for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        }
+        unknown = [name for name in fields if name not in readable or name in self.expandable_fields]
+        unknown += [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise ValidationError({"error": f"Unknown fields: {', '.join(unknown)}"})
+        return fields + expand
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        model = queryset.model
+        serializer_fields = self.get_serializer_class()().fields
+        concrete = {field.name for field in model._meta.concrete_fields}
+        load, related = set(), []
+        for name in fields:
+            source = serializer_fields[name].source
+            if name in self.expandable_fields:
+                related.append(source)
+                related_model = model._meta.get_field(source).related_model
+                load.update(f'{source}__{field.name}' for field in related_model._meta.concrete_fields)
+            elif source in concrete:
+                load.add(source)
+            load.update(self.sparse_field_dependencies.get(name, ()))
+        return queryset.select_related(None).select_related(*related).only(*load)
@@ -0,0 +1,186 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import serializers
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements kept per request for the slow-request log
+MAX_RECORDED_QUERIES = 100
+
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request has spent so far, filled in as it runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.queries = []
+
+    def add_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if len(self.queries) < MAX_RECORDED_QUERIES:
+            self.queries.append((sql, duration))
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'serialize;dur={self.serializer_time * 1000:.1f}',
+        ))
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorders():
+    """
+    Times every statement on every database connection. Queries run outside
+    a request, or in threads that do not carry its context, are not counted.
+    """
+    connection_created.connect(install_query_recorder, dispatch_uid='medisync-metrics')
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent producing ``.data`` to the current request's
+    serializer timing. Only the outermost serializer's ``.data`` is read, so
+    nested serializers are covered by it; many=True needs the mixin on the
+    list serializer class (see TimedListSerializer).
+    """
+
+    @property
+    def data(self):
+        metrics = current_request.get()
+        if metrics is None:
+            return super().data
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class MetricsRegistry:
+    """
+    Per-route request aggregates in this process. Every worker keeps its own;
+    a scrape sees the worker that answered it.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = defaultdict(int)
+            self._series = defaultdict(lambda: {
+                'buckets': [0] * (len(self.buckets) + 1),
+                'count': 0,
+                'duration': 0.0,
+                'queries': 0,
+                'db_duration': 0.0,
+                'serializer_duration': 0.0,
+                'response_bytes': 0,
+            })
+
+    def observe(self, view, method, status, duration, metrics, response_bytes):
+        with self._lock:
+            series = self._series[(view, method, str(status))]
+            series['buckets'][bisect.bisect_left(self.buckets, duration)] += 1
+            series['count'] += 1
+            series['duration'] += duration
+            series['queries'] += metrics.query_count
+            series['db_duration'] += metrics.db_time
+            series['serializer_duration'] += metrics.serializer_time
+            series['response_bytes'] += response_bytes
+
+    def increment(self, name, amount=1):
+        """Adds to a process-wide counter, rendered as ``medisync_<name>_total``."""
+        with self._lock:
+            self._counters[name] += amount
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                labels: {**series, 'buckets': list(series['buckets'])}
+                for labels, series in self._series.items()
+            }
+
+    def render(self):
+        """Returns the aggregates in the Prometheus text exposition format."""
+        series = sorted(self.snapshot().items())
+        counters = (
+            ('medisync_db_queries_total', 'queries', 'SQL queries run by requests.'),
+            ('medisync_db_duration_seconds_total', 'db_duration', 'Time spent in SQL queries.'),
+            ('medisync_serializer_duration_seconds_total', 'serializer_duration', 'Time spent serializing.'),
+            ('medisync_response_size_bytes_total', 'response_bytes', 'Response body bytes sent.'),
+        )
+        lines = [
+            '# HELP medisync_request_duration_seconds Request latency by route.',
+            '# TYPE medisync_request_duration_seconds histogram',
+        ]
+        for (view, method, status), values in series:
+            labels = f'view="{view}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values['buckets']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'medisync_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'medisync_request_duration_seconds_sum{{{labels}}} {values["duration"]:.6f}')
+            lines.append(f'medisync_request_duration_seconds_count{{{labels}}} {values["count"]}')
+        for name, key, help_text in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (view, method, status), values in series:
+                value = values[key]
+                # Counts exactly; durations with microseconds, never in exponent form
+                value = str(value) if isinstance(value, int) else f'{value:.6f}'
+                lines.append(f'{name}{{view="{view}",method="{method}",status="{status}"}} {value}')
+        for name, value in sorted(self.counters().items()):
+            lines.append(f'# TYPE medisync_{name}_total counter')
+            lines.append(f'medisync_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+@require_GET
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,135 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from .metrics import RequestMetrics, current_request, install_query_recorders, registry
+from .routers import _replica_alias, pick_replica, replica_stream
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Sent back on writes and echoed by the client on its next requests
+PIN_HEADER = 'X-MediSync-Primary'
+pin_signer = signing.TimestampSigner(salt='MediSync.middleware.ReplicaRoutingMiddleware')
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures every request: total time, SQL query count and time, serializer
+    time and response size. The figures are sent back in a Server-Timing
+    header and aggregated per route for /api/metrics. Requests slower than
+    SLOW_REQUEST_THRESHOLD_MS are logged with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_query_recorders()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing(total)
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        # The size of a streamed body is not known up front
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(view, request.method, response.status_code, total, metrics, size)
+
+        if total * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                "Slow request %s %s took %.0f ms with %d queries (%.0f ms in SQL):\n%s",
+                request.method, request.get_full_path(), total * 1000, metrics.query_count,
+                metrics.db_time * 1000,
+                '\n'.join(f'[{duration * 1000:.1f} ms] {sql}' for sql, duration in metrics.queries),
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from the replicas (see MediSync.routers).
+
+    Read-your-writes: the response to any other request carries a signed,
+    timestamped X-MediSync-Primary header. A client that sends it back is
+    pinned to the primary for REPLICA_PIN_SECONDS, long enough for the
+    replicas to catch up with what it just wrote. A header rather than a
+    cookie, as the app is served from another origin and its requests carry
+    no credentials. Streamed bodies, such as exports, keep reading from the
+    replica as they are produced.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        alias = self.replica_for(request)
+        token = _replica_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_alias.reset(token)
+        return self.finish(request, response, alias)
+
+    async def __acall__(self, request):
+        alias = self.replica_for(request)
+        token = _replica_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_alias.reset(token)
+        return self.finish(request, response, alias)
+
+    def replica_for(self, request):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        if self.is_pinned(request.headers.get(PIN_HEADER)):
+            return None
+        return pick_replica()
+
+    def is_pinned(self, pin):
+        if not pin:
+            return False
+        try:
+            pin_signer.unsign(pin, max_age=settings.REPLICA_PIN_SECONDS)
+        except signing.BadSignature:
+            # Expired pins included
+            return False
+        return True
+
+    def finish(self, request, response, alias):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response[PIN_HEADER] = pin_signer.sign('primary')
+        elif alias and response.streaming and not response.is_async:
+            response.streaming_content = replica_stream(response.streaming_content, alias)
+        return response
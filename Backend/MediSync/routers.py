@@ -0,0 +1,81 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# The replica reads are sent to, or None for the primary
+_replica_alias = ContextVar('replica_alias', default=None)
+
+
+def pick_replica():
+    """
+    Chooses one replica for a whole request or block, so its reads all see
+    the same point in the primary's history even when replicas lag by
+    different amounts. Returns None when there are none.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Lets reads inside the block go to a replica, for reports and exports run
+    outside a request. ReplicaRoutingMiddleware does the same for safe
+    requests.
+    """
+    token = _replica_alias.set(pick_replica() if enabled else None)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+def replica_stream(chunks, alias):
+    """Keeps reads on ``alias`` while a streamed response body is produced, after the middleware has returned."""
+    iterator = iter(chunks)
+    while True:
+        token = _replica_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _replica_alias.reset(token)
+        yield chunk
+
+
+def reading_from_replica():
+    """True while reads go to a replica, which may not have the latest writes yet."""
+    return _replica_alias.get() is not None and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request or block (see
+    replica_reads), and everything else to the primary.
+
+    Reads stay on the primary inside a transaction on it, so a request that
+    writes and reads back in one atomic block sees its own rows. Replicas are
+    copies of the primary and are never migrated. With no replicas
+    configured the router has no effect.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The primary and its replicas hold the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
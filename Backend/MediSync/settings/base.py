@@ -1,6 +1,7 @@
 from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
+from corsheaders.defaults import default_headers
 import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -23,9 +24,12 @@ INSTALLED_APPS = [
     'logs',
     'login',
     'settings',
+    'sync',
 ]
 
 MIDDLEWARE = [
+    'MediSync.middleware.RequestMetricsMiddleware',
+    'MediSync.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -39,6 +43,7 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'MediSync.urls'
 WSGI_APPLICATION = 'MediSync.wsgi.application'
+ASGI_APPLICATION = 'MediSync.asgi.application'
 
 TEMPLATES = [
     {
@@ -70,5 +75,67 @@ TIME_ZONE = 'Asia/Manila'
 USE_I18N = True
 USE_TZ = True
 
+# Read replicas
+# Aliases in DATABASE_REPLICAS take the reads of safe requests and of
+# reports run under MediSync.routers.replica_reads. A client that writes is
+# pinned to the primary for REPLICA_PIN_SECONDS so it reads its own changes,
+# by echoing the X-MediSync-Primary header its write was answered with.
+DATABASE_ROUTERS = ['MediSync.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-medisync-primary')
+CORS_EXPOSE_HEADERS = ['X-MediSync-Primary']
+
 STATIC_URL = '/static/'
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Medication schedule
+# Dose occurrences are materialized this many days ahead. The alert scheduler
+# and the endpoints reading them top the horizon up at most once per
+# DOSE_OCCURRENCE_TOP_UP_MINUTES; `manage.py extend_dose_occurrences` does it on demand.
+DOSE_OCCURRENCE_HORIZON_DAYS = config('DOSE_OCCURRENCE_HORIZON_DAYS', default=7, cast=int)
+DOSE_OCCURRENCE_TOP_UP_MINUTES = config('DOSE_OCCURRENCE_TOP_UP_MINUTES', default=60, cast=int)
+# Adherence reports count a dose given up to this many minutes after it was due as on time
+ADHERENCE_ON_TIME_MINUTES = config('ADHERENCE_ON_TIME_MINUTES', default=30, cast=int)
+# Local start times of the nursing shifts; the ward board counts the doses of the current one
+WARD_SHIFT_STARTS = config('WARD_SHIFT_STARTS', default='06:00,14:00,22:00', cast=Csv())
+
+# Caching
+# The default local-memory cache is per process. When running several workers
+# point CACHE_BACKEND at a shared cache (e.g.
+# django.core.cache.backends.redis.RedisCache) so list invalidations reach all
+# of them.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='medisync'),
+    }
+}
+# Upper bound, in seconds, on how long a cached list response is served
+LIST_CACHE_TIMEOUT = config('LIST_CACHE_TIMEOUT', default=300, cast=int)
+# Cached next dose times expire when the dose falls due; regimens with no
+# further dose are rechecked after this many seconds
+NEXT_DOSE_CACHE_TIMEOUT = config('NEXT_DOSE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Request metrics
+# Requests slower than this are logged with the SQL they ran
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=1000, cast=int)
+
+# Audit log
+# With AUDIT_LOG_ASYNC on, log_action queues entries for a background writer
+# that inserts them in batches (see logs.utils.AuditLogWriter for the ordering
+# and durability guarantees). Off, every entry is inserted inline.
+AUDIT_LOG_ASYNC = config('AUDIT_LOG_ASYNC', default=False, cast=bool)
+AUDIT_LOG_BATCH_SIZE = config('AUDIT_LOG_BATCH_SIZE', default=100, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+# `manage.py logs_archive` moves whole months older than LOG_RETENTION_DAYS
+# out of the Logs table into gzip-compressed JSONL files in LOG_ARCHIVE_DIR
+LOG_RETENTION_DAYS = config('LOG_RETENTION_DAYS', default=365, cast=int)
+LOG_ARCHIVE_DIR = config('LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'log_archive'))
+
+# Delta sync
+# Deletions are kept as tombstones this long; clients whose token is older
+# get a full resync. Run `manage.py prune_tombstones` periodically.
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+# Seconds a cached /api/snapshot/ body is served before its 24 hour dose window is rebuilt
+SNAPSHOT_CACHE_TIMEOUT = config('SNAPSHOT_CACHE_TIMEOUT', default=60, cast=int)
@@ -11,8 +11,18 @@ if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True)
     }
+    # Comma-separated URLs of streaming replicas of DATABASE_URL
+    for number, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+        alias = f'replica{number}'
+        DATABASES[alias] = {
+            **dj_database_url.parse(url, conn_max_age=600, ssl_require=True),
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_REPLICAS.append(alias)
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default='False', cast=bool)
+
+AUDIT_LOG_ASYNC = config('AUDIT_LOG_ASYNC', default=True, cast=bool)
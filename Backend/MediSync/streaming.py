@@ -0,0 +1,80 @@
+import contextvars
+import csv
+import io
+import json
+import zlib
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+def csv_lines(rows, columns):
+    """Yields a header and one CSV line per row dict, for StreamingHttpResponse."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header-only output for an empty report
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_lines(rows):
+    """Yields one JSON document per line for each row dict."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def buffered(chunks, size=64 * 1024):
+    """Joins small text chunks into blocks of about ``size`` characters."""
+    block, length = [], 0
+    for chunk in chunks:
+        block.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(block)
+            block, length = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def gzip_stream(chunks, level=6):
+    """Compresses text chunks into a gzip byte stream as they arrive."""
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def iterate_in_thread(chunks, context):
+    """
+    Async iterator over a sync one: each chunk is produced by sync_to_async
+    in ``context``, the context of the view that built the stream, so
+    context variables such as the replica routing stay as the view saw them.
+    """
+    iterator = iter(chunks)
+    done = object()
+    while True:
+        chunk = await sync_to_async(context.run)(next, iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def streaming_response(request, chunks, **kwargs):
+    """
+    A StreamingHttpResponse over the sync iterator ``chunks``. Under ASGI
+    Django reads a sync iterator into a list before sending any of it, so
+    there the chunks are produced one at a time through iterate_in_thread.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = iterate_in_thread(chunks, contextvars.copy_context())
+    return StreamingHttpResponse(chunks, **kwargs)
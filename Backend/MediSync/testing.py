@@ -0,0 +1,52 @@
+import asyncio
+import warnings
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_started
+from django.db import close_old_connections
+
+
+def asgi_get(path, query_string=''):
+    """
+    Serves a GET through Django's ASGIHandler, as the deployed ASGI server
+    does, and returns ``(status, body messages, warnings)``. Run from a
+    TestCase: the view runs on the test's thread and sees its transaction.
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string.encode(),
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 12345),
+        'server': ('testserver', 80),
+    }
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the response is complete
+        await asyncio.Future()
+
+    async def send(message):
+        messages.append(message)
+
+    # As the test client does, keep the test's connection open
+    request_started.disconnect(close_old_connections)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+
+    start = next(message for message in messages if message['type'] == 'http.response.start')
+    bodies = [message.get('body', b'') for message in messages if message['type'] == 'http.response.body']
+    return start['status'], bodies, [str(warning.message) for warning in caught]
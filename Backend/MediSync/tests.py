@@ -0,0 +1,148 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from MediSync.metrics import registry
+from MediSync.middleware import PIN_HEADER, ReplicaRoutingMiddleware
+from MediSync.routers import PrimaryReplicaRouter, reading_from_replica, replica_reads
+from patients.models import Patients
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        Patients.objects.create(
+            first_name="John",
+            last_name="Doe",
+            sex='M',
+            age=45,
+            contact_number=1234567890,
+            date_of_birth="1980-01-01",
+            room_number=1
+        )
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('patients-list'))
+        timing = dict(
+            (entry.split(';')[0], entry) for entry in response['Server-Timing'].split(', ')
+        )
+        self.assertEqual(set(timing), {'total', 'db', 'serialize'})
+        self.assertIn('desc="1 queries"', timing['db'])
+
+    def test_metrics_endpoint_aggregates_routes(self):
+        self.client.get(reverse('patients-list'))
+        self.client.get(reverse('patients-list'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        labels = 'view="patients-list",method="GET",status="200"'
+        self.assertIn(f'medisync_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn(f'medisync_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        # The second list is served from the cache
+        self.assertIn(f'medisync_db_queries_total{{{labels}}} 1', body)
+
+    def test_large_counters_keep_every_digit(self):
+        registry.observe(
+            'patients-list', 'GET', 200, 0.5,
+            SimpleNamespace(query_count=12345678, db_time=12345.678901, serializer_time=0.0), 98765432,
+        )
+        body = registry.render()
+        labels = 'view="patients-list",method="GET",status="200"'
+        self.assertIn(f'medisync_db_queries_total{{{labels}}} 12345678\n', body)
+        self.assertIn(f'medisync_response_size_bytes_total{{{labels}}} 98765432\n', body)
+        self.assertIn(f'medisync_db_duration_seconds_total{{{labels}}} 12345.678901\n', body)
+
+    def test_lists_read_from_a_replica_are_not_cached(self):
+        with mock.patch('MediSync.caching.reading_from_replica', return_value=True):
+            self.client.get(reverse('patients-list'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('patients-list'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('patients-list'))
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs('MediSync.middleware', level='WARNING') as logs:
+            self.client.get(reverse('patients-list'))
+        self.assertIn('Slow request GET /api/patients/', logs.output[0])
+        self.assertIn('FROM "Patients"', logs.output[0])
+
+
+# A SimpleTestCase runs outside the per-test transaction, which would keep reads on the primary
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_alias(self):
+        return self.router.db_for_read(Patients)
+
+    def middleware(self, response=None):
+        def get_response(request):
+            request.read_alias = self.read_alias()
+            return response or HttpResponse()
+        return ReplicaRoutingMiddleware(get_response)
+
+    def test_router(self):
+        self.assertEqual(self.read_alias(), 'default')
+        with replica_reads():
+            self.assertEqual(self.read_alias(), 'replica')
+            self.assertTrue(reading_from_replica())
+        self.assertFalse(reading_from_replica())
+        self.assertEqual(self.router.db_for_write(Patients), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'patients'))
+        self.assertIsNone(self.router.allow_migrate('default', 'patients'))
+
+        with override_settings(DATABASE_REPLICAS=[]), replica_reads():
+            self.assertEqual(self.read_alias(), 'default')
+
+    def test_safe_requests_read_from_replica_until_a_write(self):
+        request = self.factory.get('/api/patients/')
+        self.middleware()(request)
+        self.assertEqual(request.read_alias, 'replica')
+
+        request = self.factory.post('/api/patients/')
+        response = self.middleware()(request)
+        self.assertEqual(request.read_alias, 'default')
+        pin = response[PIN_HEADER]
+
+        # Pinned to the primary while the replicas catch up
+        request = self.factory.get('/api/patients/', headers={PIN_HEADER: pin})
+        self.middleware()(request)
+        self.assertEqual(request.read_alias, 'default')
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 6):
+            request = self.factory.get('/api/patients/', headers={PIN_HEADER: pin})
+            self.middleware()(request)
+        self.assertEqual(request.read_alias, 'replica')
+
+        request = self.factory.get('/api/patients/', headers={PIN_HEADER: 'forged'})
+        self.middleware()(request)
+        self.assertEqual(request.read_alias, 'replica')
+
+    def test_pin_header_is_allowed_cross_origin(self):
+        response = APIClient().options(
+            reverse('patients-list'),
+            HTTP_ORIGIN='http://localhost:8081',
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET',
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS=PIN_HEADER.lower(),
+        )
+        self.assertIn(PIN_HEADER.lower(), response['Access-Control-Allow-Headers'])
+        response = APIClient().post(reverse('patients-bulk-archive'), {}, format='json', HTTP_ORIGIN='http://localhost:8081')
+        self.assertIn(PIN_HEADER, response['Access-Control-Expose-Headers'])
+
+    def test_streamed_body_reads_from_replica(self):
+        def body():
+            yield self.read_alias()
+
+        response = self.middleware(StreamingHttpResponse(body()))(self.factory.get('/api/logs/export/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replica')
+        self.assertEqual(self.read_alias(), 'default')
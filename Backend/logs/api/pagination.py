@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class LogsCursorPagination(CursorPagination):
+    """
+    Keyset pagination on log_id, newest first. log_id grows with
+    (log_date, log_time), so a page costs one index range scan no matter how
+    large the table is. ``?ordering=log_id`` walks oldest first.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-log_id'
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('ordering') == 'log_id':
+            return ('log_id',)
+        return (self.ordering,)
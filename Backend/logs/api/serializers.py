@@ -1,7 +1,19 @@
 from rest_framework import serializers
+from MediSync.metrics import TimedListSerializer, TimedSerializerMixin
 from ..models import Logs
+from ..search import highlight
 
-class LogsModelSerializer(serializers.ModelSerializer):
+class LogsModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Logs
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        list_serializer_class = TimedListSerializer
+
+class LogsSearchSerializer(LogsModelSerializer):
+    """A log with a highlighted snippet of where the search matched."""
+    headline = serializers.SerializerMethodField()
+
+    def get_headline(self, obj):
+        if hasattr(obj, 'search_headline'):
+            return obj.search_headline
+        return highlight(' '.join(filter(None, (obj.log_message, obj.log_message_extended))), self.context['search_terms'])
@@ -1,7 +1,82 @@
-from rest_framework import viewsets
+from django.utils.dateparse import parse_date
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from MediSync.streaming import streaming_response
+from ..export import EXPORT_FORMATS, export_logs
 from ..models import Logs
-from .serializers import LogsModelSerializer
+from ..search import parse_search, search_logs
+from .pagination import LogsCursorPagination
+from .serializers import LogsModelSerializer, LogsSearchSerializer
+
+
+def filter_logs(queryset, params):
+    """
+    Applies the ``date_from``/``date_to`` (YYYY-MM-DD, inclusive) and
+    ``log_type`` (comma separated) filters shared by the logs endpoints.
+    """
+    for param, lookup in (('date_from', 'log_date__gte'), ('date_to', 'log_date__lte')):
+        value = params.get(param)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValidationError({param: f"Invalid date '{value}'"})
+            queryset = queryset.filter(**{lookup: parsed})
+
+    log_types = [log_type for log_type in params.get('log_type', '').split(',') if log_type]
+    if log_types:
+        queryset = queryset.filter(log_type__in=log_types)
+    return queryset
+
 
 class LogsViewSet(viewsets.ModelViewSet):
     queryset = Logs.objects.all()
     serializer_class = LogsModelSerializer
+    pagination_class = LogsCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_logs(queryset, self.request.query_params)
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Streams every log matching the list filters as CSV, or NDJSON with
+        ``?output=ndjson``, gzip-compressed with ``?compress=gzip``.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response({"error": "'output' must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        compress = request.query_params.get('compress')
+        if compress not in (None, 'gzip'):
+            return Response({"error": "'compress' must be gzip."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = filter_logs(Logs.objects.all(), request.query_params)
+        filename = f"logs-{request.query_params.get('date_from') or 'start'}-{request.query_params.get('date_to') or 'now'}.{output}"
+        if compress:
+            response = streaming_response(request, export_logs(queryset, output, compress=True), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = streaming_response(request, export_logs(queryset, output), content_type=EXPORT_FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Logs whose messages contain every term of ``?q=``, newest first and
+        cursor paginated like the list, with the list filters and a
+        highlighted ``headline``. ``"quoted words"`` match as a phrase and a
+        trailing ``*`` as a prefix.
+        """
+        terms = parse_search(request.query_params.get('q', ''))
+        if not terms:
+            return Response({"error": "'q' must contain at least one word."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = search_logs(filter_logs(Logs.objects.all(), request.query_params), terms)
+        page = self.paginate_queryset(queryset)
+        serializer = LogsSearchSerializer(page, many=True, context={**self.get_serializer_context(), 'search_terms': terms})
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from MediSync.streaming import buffered, gzip_stream, ndjson_lines
+from .export import EXPORT_COLUMNS
+from .models import Logs
+
+# Logs stays one table rather than being range-partitioned by month in
+# PostgreSQL: a partitioned table's primary key must include the partition
+# column, and Django 5.1 cannot declare a composite (log_id, log_date) key.
+# Moving whole months out to files keeps the hot table as small as detaching
+# old partitions would.
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+def archive_path(month):
+    """Returns the archive file for the month starting on ``month``."""
+    return Path(settings.LOG_ARCHIVE_DIR) / f"logs-{month:%Y-%m}.jsonl.gz"
+
+
+def month_logs(month):
+    return Logs.objects.filter(log_date__gte=month, log_date__lt=next_month(month))
+
+
+def archivable_months(retention_days, today=None):
+    """
+    Returns the first day of every month whose logs are all older than
+    ``retention_days``. Only whole months are archived, so each month's rows
+    land in a single file.
+    """
+    today = today or timezone.localdate()
+    cutoff = month_start(today - timedelta(days=retention_days))
+    return list(Logs.objects.filter(log_date__lt=cutoff).dates('log_date', 'month'))
+
+
+def read_archive(path):
+    """Yields the row dicts stored in an archive file."""
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def archive_month(month, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves one month of logs into its gzip-compressed JSONL file, then deletes
+    them from the table. Returns (written, deleted).
+
+    The rows are appended to the file as a new gzip member, written to a
+    temporary file that replaces the old one only once it is on disk, so a
+    failed run leaves the previous archive intact and the rows in the table.
+    Rows up to the highest id already in the file (from an earlier
+    interrupted run, or a restore) are not written twice; ids only grow, so
+    later rows of the month are above it. Deletion happens in batches of
+    ``batch_size`` rows, each its own short statement, so no lock is held for
+    the whole month and no id list is built in Python.
+    """
+    path = archive_path(month)
+    archived_max = max((row['log_id'] for row in read_archive(path)), default=0) if path.exists() else 0
+    seen = {'written': 0, 'max_id': None}
+
+    def pending(rows):
+        for row in rows:
+            seen['max_id'] = row['log_id']
+            if row['log_id'] > archived_max:
+                seen['written'] += 1
+                yield row
+
+    rows = month_logs(month).order_by('log_id').values(*EXPORT_COLUMNS).iterator(chunk_size=batch_size)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'wb') as f:
+        if path.exists():
+            with open(path, 'rb') as existing:
+                shutil.copyfileobj(existing, f)
+        for chunk in gzip_stream(buffered(ndjson_lines(pending(rows)))):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if seen['max_id'] is None:
+        os.remove(temporary)
+        return 0, 0
+    if seen['written']:
+        os.replace(temporary, path)
+    else:
+        os.remove(temporary)
+
+    # Rows added to the month after the read above have higher ids and wait
+    # for the next run
+    deleted = 0
+    archived = month_logs(month).filter(log_id__lte=seen['max_id']).order_by('log_id')
+    while count := Logs.objects.filter(log_id__in=archived.values('log_id')[:batch_size]).delete()[0]:
+        deleted += count
+    return seen['written'], deleted
+
+
+def restore_month(month, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Inserts one archived month back into the table with its original ids.
+    Rows still present are left alone. The file is kept, so the next archive
+    run removes the restored rows again without rewriting it. Returns the
+    number of rows read from the file.
+    """
+    path = archive_path(month)
+    if not path.exists():
+        raise FileNotFoundError(path)
+
+    fields = {name: Logs._meta.get_field(name) for name in EXPORT_COLUMNS}
+    restored, batch = 0, []
+    for row in read_archive(path):
+        batch.append(Logs(**{name: fields[name].to_python(value) for name, value in row.items()}))
+        if len(batch) >= batch_size:
+            Logs.objects.bulk_create(batch, ignore_conflicts=True)
+            restored += len(batch)
+            batch = []
+    if batch:
+        Logs.objects.bulk_create(batch, ignore_conflicts=True)
+        restored += len(batch)
+    return restored
+
+
+def parse_month(value):
+    """Parses YYYY-MM into the first day of that month."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
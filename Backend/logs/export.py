@@ -0,0 +1,21 @@
+from MediSync.streaming import buffered, csv_lines, gzip_stream, ndjson_lines
+
+EXPORT_COLUMNS = ('log_id', 'log_date', 'log_time', 'log_type', 'log_message', 'log_message_extended')
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_logs(queryset, output='csv', compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the logs in ``queryset`` oldest first as CSV or NDJSON text
+    blocks, or gzip bytes with ``compress``. Rows are fetched with
+    iterator(chunk_size) and written out as they arrive, so memory stays
+    flat however many rows are exported.
+    """
+    rows = queryset.order_by('log_id').values(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    lines = csv_lines(rows, EXPORT_COLUMNS) if output == 'csv' else ndjson_lines(rows)
+    blocks = buffered(lines)
+    return gzip_stream(blocks) if compress else blocks
@@ -0,0 +1,50 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from MediSync.routers import replica_reads
+from logs.api.views import filter_logs
+from logs.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_logs
+from logs.models import Logs
+
+
+class Command(BaseCommand):
+    help = 'Streams audit logs to a file or stdout as CSV or NDJSON, optionally gzip-compressed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='First day to export (YYYY-MM-DD).')
+        parser.add_argument('--date-to', help='Last day to export (YYYY-MM-DD).')
+        parser.add_argument('--log-type', help='Comma-separated log types to export.')
+        parser.add_argument('--output', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip.')
+        parser.add_argument('--file', help='Write to this path instead of stdout.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'log_type': options['log_type'] or '',
+        }
+        try:
+            queryset = filter_logs(Logs.objects.all(), params)
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        # A long export reads from a replica when one is configured
+        with replica_reads():
+            chunks = export_logs(queryset, options['output'], compress=options['gzip'], chunk_size=options['chunk_size'])
+            if options['file']:
+                if options['gzip']:
+                    f = open(options['file'], 'wb')
+                else:
+                    f = open(options['file'], 'w', newline='')
+                with f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            elif options['gzip']:
+                for chunk in chunks:
+                    sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
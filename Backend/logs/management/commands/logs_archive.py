@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from logs.archive import (
+    ARCHIVE_BATCH_SIZE, archivable_months, archive_month, archive_path, parse_month, restore_month,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves audit logs older than LOG_RETENTION_DAYS into monthly gzip-compressed JSONL files '
+        'under LOG_ARCHIVE_DIR and deletes them from the table, or restores an archived month.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int,
+            help='Retention in days (default: LOG_RETENTION_DAYS). Only whole months past it are archived.',
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--restore', metavar='YYYY-MM', help='Insert an archived month back into the table.')
+        parser.add_argument('--dry-run', action='store_true', help='List the months that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        if options['restore']:
+            try:
+                month = parse_month(options['restore'])
+            except ValueError:
+                raise CommandError('--restore expects a month as YYYY-MM.')
+            try:
+                restored = restore_month(month, options['batch_size'])
+            except FileNotFoundError:
+                raise CommandError(f"No archive for {month:%Y-%m} at {archive_path(month)}.")
+            self.stdout.write(f"Restored {restored} logs for {month:%Y-%m}.")
+            return
+
+        retention = options['older_than'] if options['older_than'] is not None else settings.LOG_RETENTION_DAYS
+        months = archivable_months(retention)
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f"{month:%Y-%m} -> {archive_path(month)}")
+            return
+
+        for month in months:
+            written, deleted = archive_month(month, options['batch_size'])
+            self.stdout.write(f"{month:%Y-%m}: archived {written}, deleted {deleted} -> {archive_path(month)}")
+        if not months:
+            self.stdout.write('Nothing to archive.')
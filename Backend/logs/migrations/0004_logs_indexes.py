@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0003_logs_log_message_extended'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logs',
+            index=models.Index(fields=['log_date', 'log_time'], name='logs_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logs',
+            index=models.Index(fields=['log_type', 'log_id'], name='logs_type_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:45
+
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    # A stored generated column stays in step with every insert and update,
+    # including bulk_create and restores, without triggers. The model does not
+    # declare it; logs.search queries it on PostgreSQL only.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE "Logs" ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ('
+        "to_tsvector('simple', coalesce(log_message, '') || ' ' || coalesce(log_message_extended, ''))"
+        ') STORED'
+    )
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS logs_search_vector_idx ON "Logs" USING gin (search_vector)')
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE "Logs" DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0004_logs_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
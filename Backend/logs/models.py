@@ -10,3 +10,7 @@ class Logs(models.Model):
 
     class Meta:
         db_table = 'Logs'
+        indexes = [
+            models.Index(fields=['log_date', 'log_time'], name='logs_date_time_idx'),
+            models.Index(fields=['log_type', 'log_id'], name='logs_type_id_idx'),
+        ]
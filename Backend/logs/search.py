@@ -0,0 +1,75 @@
+import re
+from functools import reduce
+from operator import and_
+from django.db import connection
+from django.db.models import BooleanField, Q, TextField
+from django.db.models.expressions import RawSQL
+
+# Quoted phrases, or bare words; a trailing * makes the last word a prefix
+SEARCH_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+WORD = re.compile(r'\w+')
+MAX_TERMS = 8
+SNIPPET_WIDTH = 160
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MinWords=10, MaxWords=30, MaxFragments=2'
+
+
+def parse_search(q):
+    """
+    Splits a query into terms, each a tuple of words and whether the last
+    word is a prefix: ``"insulin glargine" metfor*`` gives
+    [(('insulin', 'glargine'), False), (('metfor',), True)].
+    """
+    terms = []
+    for phrase, word in SEARCH_TOKEN.findall(q):
+        words = tuple(w.lower() for w in WORD.findall(phrase or word))
+        if words:
+            terms.append((words, not phrase and word.endswith('*')))
+    return terms[:MAX_TERMS]
+
+
+def to_tsquery(terms):
+    """Renders parsed terms as to_tsquery input: words in a phrase are adjacent, terms all required."""
+    return ' & '.join(
+        '(' + ' <-> '.join(words[:-1] + (words[-1] + (':*' if prefix else ''),)) + ')'
+        for words, prefix in terms
+    )
+
+
+def term_pattern(words, prefix):
+    return r'\b' + r'\W+'.join(map(re.escape, words)) + ('' if prefix else r'\b')
+
+
+def search_logs(queryset, terms):
+    """
+    Filters ``queryset`` to logs whose message or extended message contains
+    every term.
+
+    On PostgreSQL this matches the search_vector column kept by migration
+    0005 (a generated tsvector over both messages, GIN indexed) and
+    annotates ``search_headline`` with ts_headline. Other backends match
+    word-boundary regexes over both fields and leave highlighting to
+    highlight().
+    """
+    if connection.vendor == 'postgresql':
+        query = to_tsquery(terms)
+        return queryset.filter(
+            RawSQL('"Logs"."search_vector" @@ to_tsquery(\'simple\', %s)', [query], output_field=BooleanField())
+        ).annotate(search_headline=RawSQL(
+            'ts_headline(\'simple\', "Logs"."log_message" || \' \' || "Logs"."log_message_extended", '
+            'to_tsquery(\'simple\', %s), %s)',
+            [query, HEADLINE_OPTIONS],
+            output_field=TextField(),
+        ))
+    return queryset.filter(reduce(and_, (
+        Q(log_message__iregex=term_pattern(words, prefix)) | Q(log_message_extended__iregex=term_pattern(words, prefix))
+        for words, prefix in terms
+    )))
+
+
+def highlight(text, terms, width=SNIPPET_WIDTH):
+    """Returns the part of ``text`` around the first match, with every match wrapped in <mark>."""
+    pattern = re.compile('|'.join(term_pattern(words, prefix) for words, prefix in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    snippet = pattern.sub(lambda match: f'<mark>{match.group()}</mark>', text[start:start + width])
+    return ('…' if start else '') + snippet + ('…' if start + width < len(text) else '')
@@ -1,9 +1,18 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import threading
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
+from MediSync.testing import asgi_get
 from django.urls import reverse
+from .archive import archive_path, read_archive
 from .models import Logs
-from datetime import date, time
+from .utils import AuditLogWriter, log_action
+from datetime import date, time, timedelta
 
 class LogsTests(APITestCase):
     def setUp(self):
@@ -28,7 +37,97 @@ class LogsTests(APITestCase):
         """Test retrieving a list of logs"""
         response = self.client.get(self.logs_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_logs_list_is_cursor_paginated_newest_first(self):
+        """Test walking the logs one page at a time"""
+        response = self.client.get(self.logs_url, {'page_size': 1})
+        self.assertEqual([log['log_id'] for log in response.data['results']], [2])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([log['log_id'] for log in response.data['results']], [1])
+        self.assertIsNone(response.data['next'])
+
+    def test_filter_logs_by_type_and_date(self):
+        """Test server-side log filters"""
+        Logs.objects.create(
+            log_date=date(2024, 1, 1),
+            log_time=time(9, 0),
+            log_message="Old log message",
+            log_type="INFO"
+        )
+        response = self.client.get(self.logs_url, {'log_type': 'INFO'})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(self.logs_url, {'log_type': 'INFO', 'date_from': date.today().isoformat()})
+        self.assertEqual([log['log_id'] for log in response.data['results']], [1])
+        response = self.client.get(self.logs_url, {'date_to': '2024-12-31'})
+        self.assertEqual([log['log_message'] for log in response.data['results']], ["Old log message"])
+
+    def test_filter_logs_rejects_bad_date(self):
+        """Test malformed date filters"""
+        response = self.client.get(self.logs_url, {'date_from': 'last week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_csv_and_ndjson(self):
+        """Test streaming the audit log"""
+        url = reverse('logs-export')
+        response = self.client.get(url, {'log_type': 'ERROR'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'log_id,log_date,log_time,log_type,log_message,log_message_extended')
+        self.assertEqual(lines[1].split(',')[:4], ['2', date.today().isoformat(), '13:00:00', 'ERROR'])
+
+        response = self.client.get(url, {'output': 'ndjson', 'compress': 'gzip'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = [json.loads(line) for line in gzip.decompress(b''.join(response.streaming_content)).splitlines()]
+        self.assertEqual([row['log_id'] for row in rows], [1, 2])
+
+        response = self.client.get(url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_streams_under_asgi(self):
+        """Test the export is produced chunk by chunk under the ASGI handler"""
+        status_code, bodies, warnings = asgi_get(reverse('logs-export'), 'output=ndjson')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(warnings, [])
+        rows = [json.loads(line) for line in b''.join(bodies).splitlines()]
+        self.assertEqual([row['log_id'] for row in rows], [1, 2])
+
+    def test_export_logs_command(self):
+        """Test the export_logs management command"""
+        out = StringIO()
+        call_command('export_logs', '--output', 'ndjson', '--log-type', 'INFO', '--chunk-size', '1', stdout=out)
+        self.assertEqual([json.loads(line)['log_id'] for line in out.getvalue().splitlines()], [1])
+
+    def test_search_phrases_prefixes_and_filters(self):
+        """Test full-text search over both message fields"""
+        Logs.objects.create(
+            log_date=date(2024, 1, 5), log_time=time(9, 0), log_type="ADMINISTRATION",
+            log_message="Administered Metformin 500 mg to patient 12",
+            log_message_extended="Given with breakfast by nurse Cruz",
+        )
+        Logs.objects.create(
+            log_date=date(2024, 2, 5), log_time=time(9, 0), log_type="UPDATE",
+            log_message="Updated Metformin dose for patient 7",
+        )
+        url = reverse('logs-search')
+
+        def search(**params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data['results']
+
+        self.assertEqual(len(search(q='metformin')), 2)
+        self.assertEqual(len(search(q='metfor*')), 2)
+        self.assertEqual(search(q='metfor'), [])
+        self.assertEqual([r['log_type'] for r in search(q='"with breakfast" metformin')], ["ADMINISTRATION"])
+        self.assertEqual(search(q='"breakfast with"'), [])
+        self.assertEqual([r['log_type'] for r in search(q='metformin', date_from='2024-02-01')], ["UPDATE"])
+
+        headline = search(q='cruz')[0]['headline']
+        self.assertIn('<mark>Cruz</mark>', headline)
+
+        response = self.client.get(url, {'q': '***'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_create_log(self):
         """Test creating a new log"""
@@ -71,3 +170,79 @@ class LogsTests(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Logs.objects.count(), 1)
+
+
+class AuditLogWriterTests(TestCase):
+    def make_entry(self, message):
+        return Logs(log_date=date.today(), log_time=time(12, 0), log_message=message, log_type="INFO")
+
+    def make_writer(self, **kwargs):
+        self.batches = []
+        self.written = threading.Event()
+
+        def sink(batch):
+            self.batches.append(batch)
+            self.written.set()
+
+        writer = AuditLogWriter(sink=sink, **kwargs)
+        self.addCleanup(writer.stop)
+        return writer
+
+    def test_writes_full_batches_in_order(self):
+        writer = self.make_writer(batch_size=2, flush_interval=60)
+        for message in ("a", "b", "c"):
+            writer.submit(self.make_entry(message))
+        writer.flush()
+        self.assertEqual([[e.log_message for e in batch] for batch in self.batches], [["a", "b"], ["c"]])
+
+    def test_flushes_after_interval(self):
+        writer = self.make_writer(batch_size=100, flush_interval=0.01)
+        writer.submit(self.make_entry("a"))
+        self.assertTrue(self.written.wait(timeout=5))
+        self.assertEqual(len(self.batches), 1)
+
+    def test_stop_writes_pending_entries(self):
+        writer = self.make_writer(batch_size=100, flush_interval=60)
+        writer.submit(self.make_entry("a"))
+        writer.stop()
+        self.assertEqual(len(self.batches), 1)
+
+    @override_settings(AUDIT_LOG_ASYNC=False)
+    def test_log_action_sync_mode_writes_immediately(self):
+        log_action("Synchronous entry", log_type="INFO")
+        self.assertEqual(Logs.objects.get().log_message_extended, '')
+
+
+class LogsArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(LOG_ARCHIVE_DIR=directory.name, LOG_RETENTION_DAYS=30)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.old_month = (date.today() - timedelta(days=100)).replace(day=1)
+        for day in (1, 2, 3):
+            Logs.objects.create(log_date=self.old_month.replace(day=day), log_time=time(8, 0), log_message=f"Old {day}", log_type="INFO")
+        Logs.objects.create(log_date=date.today(), log_time=time(8, 0), log_message="Recent", log_type="INFO")
+
+    def test_archive_and_restore_month(self):
+        out = StringIO()
+        call_command('logs_archive', '--batch-size', '2', stdout=out)
+        self.assertEqual(list(Logs.objects.values_list('log_message', flat=True)), ["Recent"])
+        path = archive_path(self.old_month)
+        self.assertEqual([row['log_message'] for row in read_archive(path)], ["Old 1", "Old 2", "Old 3"])
+
+        month = f"{self.old_month:%Y-%m}"
+        call_command('logs_archive', '--restore', month, stdout=out)
+        self.assertEqual(Logs.objects.count(), 4)
+        self.assertEqual(Logs.objects.get(log_message="Old 2").log_date, self.old_month.replace(day=2))
+
+        # Restored rows are already in the file, so archiving again only deletes them
+        call_command('logs_archive', stdout=out)
+        self.assertEqual(Logs.objects.count(), 1)
+        self.assertEqual(len(list(read_archive(path))), 3)
+
+    def test_restore_missing_month(self):
+        with self.assertRaises(CommandError):
+            call_command('logs_archive', '--restore', '1999-01', stdout=StringIO())
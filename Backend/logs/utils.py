@@ -1,13 +1,167 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
+from django.conf import settings
+from django.db import connection
 from .models import Logs
 
-def log_action(message, log_type="INFO", message_extended=None):
-    """Logs an action to the Logs table."""
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _bulk_insert(entries):
+    Logs.objects.bulk_create(entries)
+
+
+class AuditLogWriter:
+    """
+    Buffers audit entries in memory and inserts them with bulk_create from a
+    single background thread.
+
+    A batch is written once it holds ``batch_size`` entries, ``flush_interval``
+    seconds after its first entry, on flush() and at interpreter shutdown.
+
+    Ordering: the one writer thread drains the queue first in, first out, so
+    within a process log_ids follow the order of the log_action calls. Entry
+    timestamps are taken when log_action is called, not when written.
+
+    Durability: queued entries live only in memory. A clean shutdown flushes
+    them; a hard crash (SIGKILL, OOM kill, power loss) loses at most the
+    unflushed batch. A failed insert is logged with its entries and dropped.
+    Set AUDIT_LOG_ASYNC off where every entry must be committed before the
+    response is sent.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1.0, sink=_bulk_insert):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._sink = sink
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, entry):
+        self._ensure_started()
+        self._queue.put(entry)
+
+    def flush(self, timeout=None):
+        """Blocks until everything submitted so far has been written."""
+        if not self._running():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def stop(self, timeout=None):
+        """Writes what is buffered and stops the background thread."""
+        if not self._running():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def _ensure_started(self):
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            # Also covers forked workers, which inherit the object but not the thread
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+            if item is None or len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self._sink(batch)
+        except Exception:
+            logger.exception(
+                "Failed to write %d audit log entries: %s",
+                len(batch), [entry.log_message for entry in batch],
+            )
+        finally:
+            connection.close_if_unusable_or_obsolete()
+
+
+writer = AuditLogWriter(
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+)
+atexit.register(writer.stop)
+
+
+def _build_entry(message, log_type="INFO", message_extended=None):
     now = datetime.now()
-    Logs.objects.create(
+    return Logs(
         log_date=now.date(),
         log_time=now.time(),
         log_message=message,
-        log_message_extended=message_extended,
+        log_message_extended=message_extended or '',
         log_type=log_type
-    )
\ No newline at end of file
+    )
+
+
+def log_action(message, log_type="INFO", message_extended=None):
+    """
+    Logs an action to the Logs table. With AUDIT_LOG_ASYNC the entry is queued
+    for the batched background writer, otherwise it is inserted immediately.
+    """
+    entry = _build_entry(message, log_type, message_extended)
+    if settings.AUDIT_LOG_ASYNC:
+        writer.submit(entry)
+    else:
+        entry.save()
+
+
+def log_actions(actions):
+    """
+    Logs several actions at once. ``actions`` are dicts of log_action keyword
+    arguments; without AUDIT_LOG_ASYNC they are inserted in one statement.
+    """
+    entries = [_build_entry(**action) for action in actions]
+    if settings.AUDIT_LOG_ASYNC:
+        for entry in entries:
+            writer.submit(entry)
+    else:
+        Logs.objects.bulk_create(entries)
+
+
+def flush_audit_log(timeout=None):
+    """Waits until queued audit entries have been written."""
+    writer.flush(timeout)
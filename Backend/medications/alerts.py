@@ -0,0 +1,109 @@
+import asyncio
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from .models import DoseOccurrence
+from .api.serializers import UpcomingDoseSerializer
+
+ALERT_LEAD_MINUTES = (60, 30)
+ALERT_TICK = timedelta(minutes=1)
+
+
+def collect_due_alerts(now, leads=ALERT_LEAD_MINUTES):
+    """
+    Returns the alerts to emit at ``now``: every pending dose whose due time
+    enters a lead window during this tick. Ticks are aligned to the minute, so
+    each dose falls into exactly one tick per lead.
+    """
+    alerts = []
+    for lead in leads:
+        start = now + timedelta(minutes=lead)
+        doses = (
+            DoseOccurrence.objects.pending()
+            .between(start, start + ALERT_TICK)
+            .select_related('medication__patient_number')
+        )
+        for dose in UpcomingDoseSerializer(doses, many=True).data:
+            alerts.append({**dose, 'lead_minutes': lead})
+    return alerts
+
+
+class AlertSubscription:
+    """One connected station and the wards, rooms and leads it listens to."""
+
+    def __init__(self, wards=None, rooms=None, leads=None, max_pending=100):
+        self.wards = set(wards or ())
+        self.rooms = set(rooms or ())
+        self.leads = set(leads or ALERT_LEAD_MINUTES)
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    @classmethod
+    def from_params(cls, params):
+        """Builds a subscription from ``?ward=A,B&room=101,102&lead=30``."""
+        def split(name, cast=str):
+            return [cast(value) for value in params.get(name, '').split(',') if value.strip()]
+        return cls(wards=split('ward'), rooms=split('room', int), leads=split('lead', int))
+
+    def matches(self, alert):
+        if alert['lead_minutes'] not in self.leads:
+            return False
+        if self.wards and alert['ward'] not in self.wards:
+            return False
+        if self.rooms and alert['room_number'] not in self.rooms:
+            return False
+        return True
+
+
+class DoseAlertScheduler:
+    """
+    Emits 60- and 30-minute dose alerts to connected stations from one clock.
+
+    The scheduler runs as a task on the ASGI event loop while at least one
+    station is subscribed, queries the occurrence table once per minute and
+    fans the results out. Each (dose, lead) pair is sent once per process;
+    with several workers every station still receives it once, from the
+    worker it is connected to.
+    """
+
+    def __init__(self):
+        self.subscriptions = set()
+        self._sent = {}
+        self._task = None
+
+    def subscribe(self, subscription):
+        self.subscriptions.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self, alerts, now=None):
+        now = now or timezone.now()
+        # Forget doses that are already due; they can never alert again
+        self._sent = {key: due_at for key, due_at in self._sent.items() if due_at > now}
+
+        for alert in alerts:
+            key = (alert['id'], alert['lead_minutes'])
+            if key in self._sent:
+                continue
+            self._sent[key] = now + timedelta(minutes=alert['lead_minutes']) + ALERT_TICK
+            for subscription in list(self.subscriptions):
+                if subscription.matches(alert):
+                    try:
+                        subscription.queue.put_nowait(alert)
+                    except asyncio.QueueFull:
+                        # A stalled client must not hold up everyone else
+                        pass
+
+    async def run(self):
+        while self.subscriptions:
+            now = timezone.now()
+            tick = now.replace(second=0, microsecond=0) + ALERT_TICK
+            await asyncio.sleep((tick - now).total_seconds())
+            await sync_to_async(DoseOccurrence.objects.top_up)(tick)
+            alerts = await sync_to_async(collect_due_alerts)(tick)
+            self.publish(alerts, now=tick)
+
+
+scheduler = DoseAlertScheduler()
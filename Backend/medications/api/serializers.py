@@ -1,16 +1,59 @@
+from collections import Counter
 from rest_framework import serializers
-from datetime import timedelta, datetime, time
+from datetime import timedelta
+from django.db import models, transaction
 from django.utils import timezone
-from ..models import Medications
+from MediSync.caching import invalidate_list_cache
+from MediSync.fieldsets import SparseFieldsetSerializerMixin
+from MediSync.metrics import TimedListSerializer, TimedSerializerMixin
+from sync.models import mark_changed
+from ..models import Administered, Medications, DoseOccurrence, ScheduleCounter
+from ..next_dose import cached_next_dose_times
+
+
+class MedicationsListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    def to_representation(self, data):
+        """
+        Computes the next dose of every active row lacking an annotated
+        occurrence in one vectorized pass before the rows are serialized.
+        """
+        medications = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        pending = [
+            m for m in medications
+            if getattr(m, 'next_due_at', None) is None and not getattr(m, 'patient_archived', False)
+        ]
+        self._context['next_dose_times'] = dict(
+            zip((m.pk for m in pending), cached_next_dose_times(pending))
+        )
+        return super().to_representation(medications)
 
-FREQUENCY_TYPE_TIMES = {
-    'OD': [time(8, 0)],
-    'BID': [time(8, 0), time(18, 0)],
-    'TID': [time(8, 0), time(13, 0), time(18, 0)],
-    'QID': [time(8, 0), time(12, 0), time(16, 0), time(20, 0)],
-}
-
-class MedicationsModelSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        """
+        Inserts all regimens with one bulk_create, allocating each patient's
+        schedule_ids as a single block, and generates their dose occurrences.
+        """
+        medications = [
+            Medications(**self.child.with_frequency(attrs)) for attrs in validated_data
+        ]
+        with transaction.atomic():
+            per_patient = Counter(medication.patient_number_id for medication in medications)
+            schedule_ids = {
+                patient_number: iter(ScheduleCounter.objects.allocate(patient_number, count))
+                for patient_number, count in per_patient.items()
+            }
+            for medication in medications:
+                medication.schedule_id = next(schedule_ids[medication.patient_number_id])
+            Medications.objects.bulk_create(medications)
+            DoseOccurrence.objects.generate(medications)
+            # bulk_create sends no post_save, so drop cached listings here
+            invalidate_list_cache('medications')
+            version = mark_changed(Medications.objects.filter(pk__in=[medication.pk for medication in medications]))
+            for medication in medications:
+                medication.sync_version = version
+        return medications
+
+
+class MedicationsModelSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     day = serializers.IntegerField(write_only=True, required=False, default=0)
     hour = serializers.IntegerField(write_only=True, required=False, default=8)
     minutes = serializers.IntegerField(write_only=True, required=False, default=0)
@@ -26,8 +69,10 @@ class MedicationsModelSerializer(serializers.ModelSerializer):
         model = Medications
         fields = '__all__'
         read_only_fields = ('schedule_id',)
+        list_serializer_class = MedicationsListSerializer
 
-    def create(self, validated_data):
+    def with_frequency(self, validated_data):
+        """Folds the write-only day/hour/minutes inputs into Frequency."""
         if validated_data.get('Frequency_type') == 'Other':
             validated_data['Frequency'] = timedelta(
                 days=validated_data.pop('day', 0),
@@ -39,7 +84,10 @@ class MedicationsModelSerializer(serializers.ModelSerializer):
             validated_data.pop('day', None)
             validated_data.pop('hour', None)
             validated_data.pop('minutes', None)
-        return super().create(validated_data)
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.with_frequency(validated_data))
 
     def update(self, instance, validated_data):
         if validated_data.get('Frequency_type') == 'Other':
@@ -66,50 +114,54 @@ class MedicationsModelSerializer(serializers.ModelSerializer):
         return ((obj.Frequency.seconds % 3600) // 60) if obj.Frequency else 0
 
     def get_next_dose_time(self, obj):
-        now = timezone.localtime(timezone.now())
-
-        if not obj.Medication_start_date:
+        # Listings annotate the next pending occurrence or batch-compute it
+        if getattr(obj, 'patient_archived', False):
             return None
+        next_due_at = getattr(obj, 'next_due_at', None)
+        if next_due_at is not None:
+            return timezone.localtime(next_due_at)
+        precomputed = self.context.get('next_dose_times', {})
+        if obj.pk in precomputed:
+            return precomputed[obj.pk]
+        return obj.get_next_dose_time()
+
+
+class UpcomingDoseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    medication_id = serializers.IntegerField(source='medication.id')
+    schedule_id = serializers.IntegerField(source='medication.schedule_id')
+    physicianID = serializers.CharField(source='medication.physicianID')
+    Medication_name = serializers.CharField(source='medication.Medication_name')
+    Medication_form = serializers.CharField(source='medication.Medication_form')
+    Medication_strength = serializers.IntegerField(source='medication.Medication_strength')
+    Medication_unit = serializers.CharField(source='medication.Medication_unit')
+    Medication_route = serializers.CharField(source='medication.Medication_route')
+    Medication_notes = serializers.CharField(source='medication.Medication_notes')
+    patient_number = serializers.IntegerField(source='medication.patient_number.patient_number')
+    first_name = serializers.CharField(source='medication.patient_number.first_name')
+    last_name = serializers.CharField(source='medication.patient_number.last_name')
+    room_number = serializers.IntegerField(source='medication.patient_number.room_number')
+    bed_number = serializers.IntegerField(source='medication.patient_number.bed_number')
+    ward = serializers.CharField(source='medication.patient_number.ward')
 
-        freq_type = obj.Frequency_type
-
-        # Handle fixed frequency types like OD, BID, TID, QID
-        if freq_type in FREQUENCY_TYPE_TIMES:
-            dose_times = FREQUENCY_TYPE_TIMES[freq_type]
-
-            for day_offset in range(0, 30):  # Look ahead up to 30 days
-                current_date = obj.Medication_start_date + timedelta(days=day_offset)
-
-                # Check if current_date is past the end date
-                if obj.Medication_end_date and current_date > obj.Medication_end_date:
-                    return None
-
-                for dose_time in dose_times:
-                    dose_datetime = timezone.make_aware(datetime.combine(current_date, dose_time))
-
-                    if dose_datetime > now:
-                        return dose_datetime
-
-            return None  # No dose found in next 30 days
-
-        # Custom 'Other' frequency using timedelta
-        if not obj.Frequency or obj.Frequency.total_seconds() == 0:
-            return None
-
-        med_time = obj.Medication_Time or time(0, 0)
-        start_datetime = timezone.make_aware(datetime.combine(obj.Medication_start_date, med_time))
-
-        if now < start_datetime:
-            return start_datetime
-
-        elapsed = now - start_datetime
-        intervals_passed = int(elapsed.total_seconds() // obj.Frequency.total_seconds()) + 1
-        next_dose = start_datetime + (obj.Frequency * intervals_passed)
+    class Meta:
+        model = DoseOccurrence
+        list_serializer_class = TimedListSerializer
+        fields = (
+            'id', 'due_at', 'slot', 'status',
+            'medication_id', 'schedule_id', 'physicianID', 'Medication_name', 'Medication_form',
+            'Medication_strength', 'Medication_unit', 'Medication_route', 'Medication_notes',
+            'patient_number', 'first_name', 'last_name', 'room_number', 'bed_number', 'ward',
+        )
 
-        if obj.Medication_end_date:
-            end_datetime = timezone.make_aware(datetime.combine(obj.Medication_end_date, time(23, 59, 59)))
-            if next_dose > end_datetime:
-                return None
 
-        return next_dose
+class AdministeredSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    patient_number = serializers.IntegerField(source='medication.patient_number_id')
+    schedule_id = serializers.IntegerField(source='medication.schedule_id')
 
+    class Meta:
+        model = Administered
+        list_serializer_class = TimedListSerializer
+        fields = (
+            'id', 'medication', 'patient_number', 'schedule_id',
+            'scheduled_time', 'administered_time', 'administered_by',
+        )
@@ -1,11 +1,22 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import MedicationsViewSet
+from .views import MedicationsViewSet, WardBoardView, dose_alert_stream
 
 router = DefaultRouter()
 router.register(r'medications', MedicationsViewSet, basename='medications')
 
 urlpatterns = router.urls + [
+    path('wards/board/', WardBoardView.as_view(), name='ward-board'),
+    path(
+        'medications/alerts/stream/',
+        dose_alert_stream,
+        name='medications-alert-stream'
+    ),
+    path(
+        'medications/<str:patient_number>/<str:schedule_id>/administer/',
+        MedicationsViewSet.as_view({'post': 'administer'}),
+        name='medications-administer'
+    ),
     path(
         'medications/<str:patient_number>/<str:schedule_id>/',
         MedicationsViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}),
@@ -1,20 +1,132 @@
+import asyncio
+import json
+from collections import defaultdict
+from datetime import time, timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..models import Medications
-from .serializers import MedicationsModelSerializer
-from logs.utils import log_action
+from rest_framework.views import APIView
+from django.views.decorators.http import require_GET
+from django.conf import settings
+from MediSync.caching import CachedListMixin, invalidate_list_cache
+from MediSync.fieldsets import SparseFieldsetMixin
+from MediSync.streaming import csv_lines, ndjson_lines, streaming_response
+from ..alerts import AlertSubscription, scheduler
+from ..board import ward_board
+from ..models import Administered, Medications, DoseOccurrence
+from ..reports import ADHERENCE_COUNT_COLUMNS, ADHERENCE_GROUP_COLUMNS, adherence_report
+from ..schedule import dose_datetime, dose_slot, iter_dose_times
+from .serializers import AdministeredSerializer, MedicationsModelSerializer, UpcomingDoseSerializer
+from logs.utils import log_action, log_actions
 
-class MedicationsViewSet(viewsets.ModelViewSet):
+CALENDAR_MAX_DAYS = 62
+ADHERENCE_MAX_DAYS = 92
+BULK_MAX_ITEMS = 200
+# How long before it falls due a dose may be recorded as given
+ADMINISTER_EARLY_MINUTES = 60
+
+
+def parse_date_param(value, default):
+    """Parses a YYYY-MM-DD query parameter. Raises ValueError on malformed input."""
+    if not value:
+        return default
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date '{value}'")
+    return parsed
+
+
+def parse_datetime_param(value, default):
+    """
+    Parses an ISO 8601 query parameter into an aware datetime. Naive values are
+    taken in the server's timezone. Raises ValueError on malformed input.
+    """
+    if not value:
+        return default
+    # An unencoded '+' in a UTC offset arrives as a space
+    parsed = parse_datetime(value.replace(' ', '+'))
+    if parsed is None:
+        raise ValueError(f"Invalid datetime '{value}'")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def build_administration(medication, data):
+    """
+    Validates one administration payload against its regimen. Returns an
+    unsaved Administered and an error message, one of them None.
+    """
+    raw_scheduled, raw_administered = data.get('scheduled_time'), data.get('administered_time')
+    try:
+        scheduled_time = parse_datetime_param(raw_scheduled and str(raw_scheduled), None)
+        administered_time = parse_datetime_param(raw_administered and str(raw_administered), timezone.now())
+    except ValueError as e:
+        return None, str(e)
+    if scheduled_time is None:
+        return None, "'scheduled_time' is required."
+    if scheduled_time > timezone.now() + timedelta(minutes=ADMINISTER_EARLY_MINUTES):
+        return None, (
+            f"The dose due at {scheduled_time.isoformat()} cannot be recorded more than "
+            f"{ADMINISTER_EARLY_MINUTES} minutes early."
+        )
+    if dose_slot(medication, scheduled_time) is None:
+        return None, f"No dose of this medication is due at {scheduled_time.isoformat()}."
+    return Administered(
+        medication=medication,
+        scheduled_time=scheduled_time,
+        administered_time=administered_time,
+        administered_by=str(data.get('administered_by') or '')[:100],
+    ), None
+
+
+def log_administrations(doses):
+    log_actions([
+        {
+            'message': f"{dose.administered_by or 'Unknown'} Administered medication '{dose.medication.Medication_name}' for patient {dose.medication.patient_number_id}|{dose.medication.patient_number.last_name}, {dose.medication.patient_number.first_name}.",
+            'log_type': "ADMINISTRATION",
+            'message_extended': f"{dose.administered_by or 'Unknown'} Administered medication '{dose.medication.Medication_name}' {dose.medication.Medication_unit}{dose.medication.Medication_strength}{dose.medication.Medication_form} due {timezone.localtime(dose.scheduled_time)} for patient {dose.medication.patient_number_id} at {timezone.localtime(dose.administered_time)}.",
+        }
+        for dose in doses
+    ])
+
+
+class MedicationsViewSet(CachedListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Medications.objects.all()
     serializer_class = MedicationsModelSerializer
     lookup_field = "schedule_id"
     lookup_url_kwarg = "schedule_id"
+    list_cache_namespace = 'medications'
+    sparse_field_dependencies = {
+        'frequency_days': ('Frequency',),
+        'frequency_hours': ('Frequency',),
+        'frequency_minutes': ('Frequency',),
+        'next_dose_time': (
+            'Medication_start_date', 'Medication_end_date', 'Medication_Time', 'Frequency_type', 'Frequency',
+        ),
+    }
+
+    def get_list_cache_timeout(self, data):
+        """A cached listing expires when the earliest next dose in it comes due."""
+        timeout = settings.LIST_CACHE_TIMEOUT
+        now = timezone.now()
+        for row in data:
+            due_at = row.get('next_dose_time')
+            if due_at is not None:
+                timeout = min(timeout, (due_at - now).total_seconds())
+        return int(timeout)
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         patient_number = self.request.query_params.get('patient_number')
         if patient_number:
-            return Medications.objects.filter(patient_number=patient_number)
-        return super().get_queryset()
+            queryset = queryset.filter(patient_number=patient_number)
+        return queryset.with_next_dose()
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
@@ -42,6 +154,284 @@ class MedicationsViewSet(viewsets.ModelViewSet):
 
         return response
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Creates a list of regimens in one transaction. By default any invalid
+        item rejects the whole request; with ``?partial=true`` the valid items
+        are created and the invalid ones reported by index.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of medications."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {BULK_MAX_ITEMS} medications can be created at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.query_params.get('partial') == 'true':
+            valid, errors = [], []
+            for index, item in enumerate(items):
+                serializer = self.get_serializer(data=item)
+                if serializer.is_valid():
+                    valid.append(serializer.validated_data)
+                else:
+                    errors.append({'index': index, 'errors': serializer.errors})
+        else:
+            serializer = self.get_serializer(data=items, many=True)
+            if not serializer.is_valid():
+                errors = [{'index': index, 'errors': e} for index, e in enumerate(serializer.errors) if e]
+                return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+            valid, errors = serializer.validated_data, []
+
+        if not valid:
+            return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        list_serializer = self.get_serializer(many=True)
+        medications = list_serializer.create(valid)
+
+        log_actions([
+            {
+                'message': f"{m.physicianID} Added medication '{m.Medication_name}' for patient {m.patient_number_id}|{m.patient_number.last_name}, {m.patient_number.first_name}.",
+                'log_type': "CREATION",
+                'message_extended': f"{m.physicianID} Added medication '{m.Medication_name}' {m.Medication_unit}{m.Medication_strength}{m.Medication_form} for patient {m.patient_number_id} via {m.Medication_route} starting {m.Medication_start_date} and ends {m.Medication_end_date or 'No End Date'}.",
+            }
+            for m in medications
+        ])
+
+        return Response(
+            {'created': self.get_serializer(medications, many=True).data, 'errors': errors},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED,
+        )
+
+    def administer(self, request, patient_number=None, schedule_id=None):
+        """
+        Records that the dose of the regimen due at ``scheduled_time`` was
+        given. Repeating the request returns the existing record with 200.
+        """
+        try:
+            medication = Medications.objects.select_related('patient_number').get(
+                patient_number=patient_number, schedule_id=schedule_id
+            )
+        except (Medications.DoesNotExist, ValueError):
+            return Response({"error": "Medication not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        dose, error = build_administration(medication, request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        (record,), created = Administered.objects.record([dose])
+        if created:
+            log_administrations([dose])
+            invalidate_list_cache('medications')
+        return Response(
+            AdministeredSerializer(record).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['post'], url_path='administer')
+    def administer_bulk(self, request):
+        """
+        Records a med-pass round: a list of ``{patient_number, schedule_id,
+        scheduled_time, administered_time, administered_by}`` stored in one
+        transaction. Any invalid item rejects the round unless
+        ``?partial=true``; doses recorded before are returned unchanged.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of doses."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {BULK_MAX_ITEMS} doses can be recorded at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        keys = []
+        for item in items:
+            try:
+                keys.append((int(item['patient_number']), int(item['schedule_id'])))
+            except (KeyError, TypeError, ValueError):
+                keys.append(None)
+        medications = {
+            (medication.patient_number_id, medication.schedule_id): medication
+            for medication in Medications.objects.filter(
+                patient_number__in={key[0] for key in keys if key},
+                schedule_id__in={key[1] for key in keys if key},
+            ).select_related('patient_number')
+        }
+
+        doses, errors = [], []
+        for index, (item, key) in enumerate(zip(items, keys)):
+            if key is None:
+                errors.append({'index': index, 'errors': "'patient_number' and 'schedule_id' are required."})
+                continue
+            if key not in medications:
+                errors.append({'index': index, 'errors': "Medication not found"})
+                continue
+            dose, error = build_administration(medications[key], item)
+            if error:
+                errors.append({'index': index, 'errors': error})
+            else:
+                doses.append(dose)
+
+        if errors and (request.query_params.get('partial') != 'true' or not doses):
+            return Response({'administered': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        records, created = Administered.objects.record(doses)
+        new_doses = {
+            (dose.medication_id, dose.scheduled_time): dose
+            for dose in doses if (dose.medication_id, dose.scheduled_time) in created
+        }
+        if new_doses:
+            log_administrations(new_doses.values())
+            invalidate_list_cache('medications')
+
+        return Response(
+            {'administered': AdministeredSerializer(records, many=True).data, 'errors': errors},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=['get'], url_path='upcoming')
+    def upcoming(self, request):
+        """
+        Lists pending doses due in ``[from, to)`` (default: the next hour),
+        optionally limited to one ward, with patient name and room included.
+        """
+        try:
+            start = parse_datetime_param(request.query_params.get('from'), timezone.now())
+            end = parse_datetime_param(request.query_params.get('to'), start + timedelta(hours=1))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if end <= start:
+            return Response({"error": "'to' must be after 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        DoseOccurrence.objects.top_up()
+        doses = (
+            DoseOccurrence.objects.pending()
+            .between(start, end)
+            .select_related('medication__patient_number')
+        )
+        ward = request.query_params.get('ward')
+        if ward:
+            doses = doses.filter(medication__patient_number__ward=ward)
+
+        serializer = UpcomingDoseSerializer(doses, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='calendar')
+    def calendar(self, request):
+        """
+        Expands every dose of every regimen between ``start`` and ``end``
+        (inclusive dates, default: the current month) and groups them by day.
+        Patients are joined in the same query; recorded occurrence statuses
+        are merged in from the occurrence table.
+        """
+        today = timezone.localdate()
+        first_of_month = today.replace(day=1)
+        next_month = (first_of_month + timedelta(days=32)).replace(day=1)
+        try:
+            start = parse_date_param(request.query_params.get('start'), first_of_month)
+            end = parse_date_param(request.query_params.get('end'), next_month - timedelta(days=1))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start:
+            return Response({"error": "'end' must not be before 'start'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= CALENDAR_MAX_DAYS:
+            return Response(
+                {"error": f"The range may span at most {CALENDAR_MAX_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        range_start = dose_datetime(start, time(0, 0))
+        range_end = dose_datetime(end + timedelta(days=1), time(0, 0))
+        regimens = (
+            Medications.objects
+            .filter(Medication_start_date__lte=end)
+            .of_active_patients()
+            .filter(Q(Medication_end_date__isnull=True) | Q(Medication_end_date__gte=start))
+            .select_related('patient_number')
+        )
+        recorded = {
+            (medication_id, due_at): dose_status
+            for medication_id, due_at, dose_status in DoseOccurrence.objects
+            .between(range_start, range_end)
+            .exclude(status='scheduled')
+            .values_list('medication_id', 'due_at', 'status')
+        }
+
+        days = defaultdict(list)
+        for medication in regimens:
+            patient = medication.patient_number
+            for slot, due_at in iter_dose_times(medication, range_start, range_end):
+                local_due_at = timezone.localtime(due_at)
+                days[local_due_at.date().isoformat()].append({
+                    'due_at': local_due_at,
+                    'time': local_due_at.time(),
+                    'slot': slot,
+                    'status': recorded.get((medication.id, due_at), 'scheduled'),
+                    'medication_id': medication.id,
+                    'schedule_id': medication.schedule_id,
+                    'Medication_name': medication.Medication_name,
+                    'Frequency_type': medication.Frequency_type,
+                    'patient_number': patient.patient_number,
+                    'first_name': patient.first_name,
+                    'last_name': patient.last_name,
+                })
+        for doses in days.values():
+            doses.sort(key=lambda dose: dose['due_at'])
+
+        return Response(
+            {'start': start, 'end': end, 'days': dict(sorted(days.items()))},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['get'], url_path='adherence')
+    def adherence(self, request):
+        """
+        Streams how many doses due from ``start`` to ``end`` (inclusive dates,
+        default: the last 30 days) were given on time, late or missed, per
+        patient or with ``?group=ward`` per ward. Optional ``ward`` and
+        ``patient_number`` filters. CSV by default, NDJSON with
+        ``?output=ndjson``.
+        """
+        today = timezone.localdate()
+        try:
+            start = parse_date_param(request.query_params.get('start'), today - timedelta(days=29))
+            end = parse_date_param(request.query_params.get('end'), today)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start:
+            return Response({"error": "'end' must not be before 'start'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= ADHERENCE_MAX_DAYS:
+            return Response(
+                {"error": f"The range may span at most {ADHERENCE_MAX_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        group = request.query_params.get('group', 'patient')
+        if group not in ADHERENCE_GROUP_COLUMNS:
+            return Response({"error": "'group' must be patient or ward."}, status=status.HTTP_400_BAD_REQUEST)
+        output = request.query_params.get('output', 'csv')
+        if output not in ('csv', 'ndjson'):
+            return Response({"error": "'output' must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+        patient_number = request.query_params.get('patient_number')
+        if patient_number and not patient_number.isdigit():
+            return Response({"error": f"Invalid patient_number '{patient_number}'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = adherence_report(
+            start, end, group=group,
+            ward=request.query_params.get('ward'),
+            patient_number=patient_number,
+        )
+        if output == 'ndjson':
+            return streaming_response(request, ndjson_lines(rows), content_type='application/x-ndjson')
+        response = streaming_response(
+            request, csv_lines(rows, ADHERENCE_GROUP_COLUMNS[group] + ADHERENCE_COUNT_COLUMNS), content_type='text/csv'
+        )
+        response['Content-Disposition'] = f'attachment; filename="adherence-{start}-{end}.csv"'
+        return response
+
     def retrieve(self, request, *args, **kwargs):
         try:
             patient_number = kwargs.get("patient_number")
@@ -117,4 +507,54 @@ def update(self, request, *args, **kwargs):
         return Response(
             {"message": f"Successfully archived {count} medication(s) for patient {patient_number}."},
             status=status.HTTP_204_NO_CONTENT,
-        )
\ No newline at end of file
+        )
+
+
+ALERT_KEEPALIVE_SECONDS = 15
+
+
+async def alert_events(subscription):
+    """Yields Server-Sent Events for one subscription until the client leaves."""
+    scheduler.subscribe(subscription)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                alert = await asyncio.wait_for(subscription.queue.get(), ALERT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            data = json.dumps(alert, cls=DjangoJSONEncoder)
+            yield f"event: dose-alert\nid: {alert['id']}-{alert['lead_minutes']}\ndata: {data}\n\n"
+    finally:
+        scheduler.unsubscribe(subscription)
+
+
+class WardBoardView(APIView):
+    """
+    Active patients by ward, room and bed with their next dose and this
+    shift's dose counts, for the station board. ``?ward=`` limits it to one ward.
+    """
+
+    def get(self, request):
+        DoseOccurrence.objects.top_up()
+        return Response(ward_board(ward=request.query_params.get('ward')), status=status.HTTP_200_OK)
+
+
+@require_GET
+async def dose_alert_stream(request):
+    """
+    Streams 60- and 30-minute dose alerts as Server-Sent Events. Stations
+    subscribe with ``?ward=``, ``?room=`` and ``?lead=`` (comma separated).
+    Requires the ASGI application.
+    """
+    try:
+        subscription = AlertSubscription.from_params(request.GET)
+    except ValueError:
+        return JsonResponse({"error": "room and lead must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(alert_events(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
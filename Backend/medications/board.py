@@ -0,0 +1,89 @@
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from patients.models import Patients
+from .models import DoseOccurrence
+
+BOARD_PATIENT_COLUMNS = ('patient_number', 'first_name', 'middle_name', 'last_name', 'ward', 'room_number', 'bed_number')
+
+
+def current_shift(now=None):
+    """Returns the (start, end) of the nursing shift ``now`` falls in, from WARD_SHIFT_STARTS."""
+    now = timezone.localtime(now or timezone.now())
+    starts = sorted(time.fromisoformat(start) for start in settings.WARD_SHIFT_STARTS)
+    day = now.date()
+    # The last shift of the previous day runs past midnight
+    candidates = [datetime.combine(day - timedelta(days=1), starts[-1])] + [
+        datetime.combine(day, start) for start in starts
+    ] + [datetime.combine(day + timedelta(days=1), starts[0])]
+    candidates = [timezone.make_aware(candidate) for candidate in candidates]
+    index = max(i for i, start in enumerate(candidates) if start <= now)
+    return candidates[index], candidates[index + 1]
+
+
+def ward_board(ward=None, now=None):
+    """
+    Returns active patients grouped by ward, room and bed, each with their
+    next pending dose and the doses due in the current shift.
+
+    Everything comes from one query: patients in (ward, room_number,
+    bed_number) order along the active partial index, with correlated
+    subqueries on the occurrence table's (medication, due_at) key for the
+    next dose and the shift counts.
+    """
+    now = now or timezone.now()
+    shift_start, shift_end = current_shift(now)
+
+    doses = DoseOccurrence.objects.filter(medication__patient_number=OuterRef('pk')).order_by()
+    next_dose = doses.pending().filter(due_at__gte=now).order_by('due_at', 'id')
+    shift_doses = doses.filter(due_at__gte=shift_start, due_at__lt=shift_end).values('medication__patient_number')
+
+    patients = (
+        Patients.objects.active()
+        .order_by('ward', 'room_number', 'bed_number', 'patient_number')
+        .annotate(
+            next_dose_id=Subquery(next_dose.values('id')[:1]),
+            next_due_at=Subquery(next_dose.values('due_at')[:1]),
+            next_medication_id=Subquery(next_dose.values('medication_id')[:1]),
+            next_medication_name=Subquery(next_dose.values('medication__Medication_name')[:1]),
+            doses_this_shift=Coalesce(Subquery(shift_doses.annotate(n=Count('pk')).values('n')), 0),
+            pending_this_shift=Coalesce(
+                Subquery(shift_doses.filter(status='scheduled').annotate(n=Count('pk')).values('n')), 0
+            ),
+        )
+    )
+    if ward:
+        patients = patients.filter(ward=ward)
+
+    rows = patients.values(
+        *BOARD_PATIENT_COLUMNS, 'next_dose_id', 'next_due_at', 'next_medication_id', 'next_medication_name',
+        'doses_this_shift', 'pending_this_shift',
+    )
+    wards = []
+    for ward_name, ward_rows in groupby(rows, key=lambda row: row['ward']):
+        rooms = []
+        for room_number, room_rows in groupby(ward_rows, key=lambda row: row['room_number']):
+            rooms.append({'room_number': room_number, 'beds': [_bed(row) for row in room_rows]})
+        wards.append({'ward': ward_name, 'rooms': rooms})
+    return {'shift': {'start': shift_start, 'end': shift_end}, 'wards': wards}
+
+
+def _bed(row):
+    next_dose = None
+    if row['next_dose_id'] is not None:
+        next_dose = {
+            'id': row['next_dose_id'],
+            'due_at': row['next_due_at'],
+            'medication_id': row['next_medication_id'],
+            'Medication_name': row['next_medication_name'],
+        }
+    return {
+        'bed_number': row['bed_number'],
+        'patient': {column: row[column] for column in BOARD_PATIENT_COLUMNS if column not in ('ward', 'room_number', 'bed_number')},
+        'next_dose': next_dose,
+        'doses_this_shift': row['doses_this_shift'],
+        'pending_this_shift': row['pending_this_shift'],
+    }
@@ -0,0 +1,259 @@
+import contextlib
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, time as dt_time, timedelta
+import numpy as np
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+from logs.models import Logs
+from medications.models import DoseOccurrence, Medications
+from medications.schedule import batch_next_dose_times, next_dose_time
+from patients.models import Patients
+
+FREQUENCY_TYPES = ('OD', 'BID', 'TID', 'QID', 'Other')
+LOG_TYPES = ('INFO', 'CREATION', 'UPDATE', 'Archive', 'ERROR')
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kb')
+
+
+def seed(patients, regimens, logs, rng):
+    """Inserts synthetic patients, regimens (with their occurrences) and log rows."""
+    today = timezone.localdate()
+    created_patients = Patients.objects.bulk_create([
+        Patients(
+            first_name=f"Patient{number}",
+            last_name=f"Bench{number % 97}",
+            age=rng.randint(18, 95),
+            sex=rng.choice('MF'),
+            contact_number='09170000000',
+            date_of_birth=date(1950, 1, 1) + timedelta(days=rng.randint(0, 20000)),
+            room_number=100 + number // 4,
+            bed_number=number % 4 + 1,
+            ward=f"Ward {number % 6}",
+        )
+        for number in range(patients)
+    ])
+    # Backends that cannot return ids from bulk_create
+    if created_patients and created_patients[0].pk is None:
+        created_patients = list(Patients.objects.order_by('patient_number'))
+
+    medications = []
+    for patient in created_patients:
+        for schedule_id in range(1, regimens + 1):
+            frequency_type = FREQUENCY_TYPES[(schedule_id - 1) % len(FREQUENCY_TYPES)]
+            start = today - timedelta(days=rng.randint(0, 30))
+            medications.append(Medications(
+                patient_number=patient,
+                schedule_id=schedule_id,
+                physicianID=f"DOC-{rng.randint(1, 20)}",
+                Medication_name=rng.choice(('Paracetamol', 'Metformin', 'Amlodipine', 'Losartan')),
+                Medication_strength=rng.choice((5, 50, 500)),
+                Medication_Time=dt_time(rng.randint(0, 23), rng.choice((0, 30))),
+                Medication_start_date=start,
+                Medication_end_date=rng.choice((None, start + timedelta(days=rng.randint(7, 60)))),
+                Frequency_type=frequency_type,
+                Frequency=timedelta(hours=rng.randint(4, 48)) if frequency_type == 'Other' else None,
+            ))
+    Medications.objects.bulk_create(medications, batch_size=1000)
+    DoseOccurrence.objects.generate(Medications.objects.select_related('patient_number'))
+
+    now = datetime.now()
+    Logs.objects.bulk_create(
+        [
+            Logs(
+                log_date=(now - timedelta(minutes=number)).date(),
+                log_time=(now - timedelta(minutes=number)).time(),
+                log_message=f"Bench log entry {number}",
+                log_type=rng.choice(LOG_TYPES),
+            )
+            for number in range(logs)
+        ],
+        batch_size=1000,
+    )
+    return created_patients
+
+
+def build_scenarios(client, patients, rng):
+    """Returns the benchmarked operations, keyed by name."""
+    patient_numbers = [patient.patient_number for patient in patients]
+
+    def by_number():
+        return client.get(f'/api/patients/by-number/{rng.choice(patient_numbers)}/')
+
+    def create_medication():
+        return client.post('/api/medications/', {
+            'physicianID': 'DOC-1',
+            'patient_number': rng.choice(patient_numbers),
+            'Medication_name': 'Paracetamol',
+            'Medication_strength': 500,
+            'Medication_Time': '09:00:00',
+            'Medication_start_date': timezone.localdate().isoformat(),
+            'Frequency_type': rng.choice(FREQUENCY_TYPES[:4]),
+        }, format='json')
+
+    def next_dose():
+        medications = list(Medications.objects.all())
+        return [next_dose_time(medication) for medication in medications]
+
+    def next_dose_batch():
+        return batch_next_dose_times(Medications.objects.all())
+
+    return {
+        'patients-list': lambda: client.get('/api/patients/'),
+        'medications-list': lambda: client.get('/api/medications/'),
+        'patients-by-number': by_number,
+        'logs-list': lambda: client.get('/api/logs/'),
+        'medications-create': create_medication,
+        'next-dose': next_dose,
+        'next-dose-batch': next_dose_batch,
+    }
+
+
+def run_scenario(operation, iterations, warmup, cached=False):
+    """
+    Times ``iterations`` calls after ``warmup`` untimed ones, then makes one
+    more call to count its SQL queries and peak Python memory, so tracing
+    does not skew the timings. Unless ``cached``, the cache is cleared before
+    every call so the uncached path is measured.
+    """
+    def call():
+        if not cached:
+            cache.clear()
+        result = operation()
+        status_code = getattr(result, 'status_code', 200)
+        if status_code >= 400:
+            raise CommandError(f"Benchmark request failed with status {status_code}: {result.content[:500]!r}")
+
+    for _ in range(warmup):
+        call()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a message for every metric that regressed by more than
+    ``threshold`` (a fraction) against the baseline. Query counts may not
+    grow at all.
+    """
+    regressions = []
+    for name, metrics in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            if metric not in previous:
+                continue
+            allowed = previous[metric] if metric == 'queries' else previous[metric] * (1 + threshold)
+            if metrics[metric] > allowed:
+                regressions.append(f"{name} {metric}: {metrics[metric]} > {previous[metric]} (allowed {allowed:g})")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds synthetic data into a throwaway test database, drives the main endpoints in-process '
+        'and reports latency percentiles, SQL query counts and peak memory as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=200)
+        parser.add_argument('--regimens', type=int, default=5, help='Regimens per patient.')
+        parser.add_argument('--logs', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenario', action='append', help='Only run the named scenario(s).')
+        parser.add_argument('--cached', action='store_true', help='Keep the cache warm between calls.')
+        parser.add_argument('--output', help='Also write the JSON report to this file.')
+        parser.add_argument('--baseline', help='JSON report to compare against.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed regression against the baseline, as a fraction (default: 0.2).',
+        )
+        parser.add_argument(
+            '--no-isolate', action='store_true',
+            help='Use the current database instead of creating a test database. Seeded rows are kept.',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        # Stray prints from views go to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            if options['no_isolate']:
+                results = self.run(options)
+            else:
+                setup_test_environment()
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    results = self.run(options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+                    teardown_test_environment()
+
+        report = json.dumps(results, indent=2)
+        self.stdout.write(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        patients = seed(options['patients'], options['regimens'], options['logs'], rng)
+        scenarios = build_scenarios(APIClient(), patients, rng)
+
+        selected = options['scenario'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        return {
+            'parameters': {
+                key: options[key]
+                for key in ('patients', 'regimens', 'logs', 'iterations', 'warmup', 'seed', 'cached')
+            },
+            'database': connection.vendor,
+            'scenarios': {
+                name: run_scenario(scenarios[name], options['iterations'], options['warmup'], options['cached'])
+                for name in selected
+            },
+        }
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from medications.models import DoseOccurrence
+
+
+class Command(BaseCommand):
+    help = 'Generates dose occurrences up to the end of the rolling horizon now, without waiting for the next top-up.'
+
+    def handle(self, *args, **options):
+        created = DoseOccurrence.objects.extend_horizon()
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} dose occurrence(s).'))
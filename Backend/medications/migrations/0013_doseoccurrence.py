@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0012_medications_physicianid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoseOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(db_index=True, help_text='Date and time when the dose is due')),
+                ('slot', models.PositiveIntegerField(default=0, help_text='Daily slot for fixed frequencies, interval number for Other')),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('administered', 'Administered'), ('missed', 'Missed')], default='scheduled', help_text='Whether the dose is still pending, given or missed', max_length=20)),
+                ('medication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='medications.medications')),
+            ],
+            options={
+                'db_table': 'DoseOccurrence',
+                'ordering': ['due_at'],
+                'indexes': [models.Index(fields=['status', 'due_at'], name='doseoccurrence_status_due')],
+                'unique_together': {('medication', 'due_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0013_doseoccurrence'),
+        ('patients', '0006_patients_ward'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleCounter',
+            fields=[
+                ('patient_number', models.OneToOneField(db_column='patient_number', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='patients.patients')),
+                ('last_schedule_id', models.IntegerField(default=0, help_text='Highest schedule_id handed out for the patient')),
+            ],
+            options={
+                'db_table': 'ScheduleCounter',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0014_schedulecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='administered',
+            name='administered_by',
+            field=models.CharField(blank=True, default='', help_text='ID of the nurse who administered the dose', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='administered',
+            name='scheduled_time',
+            field=models.DateTimeField(blank=True, help_text='Due time of the dose that was given; identifies the dose occurrence', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='administered',
+            index=models.Index(fields=['medication', 'administered_time'], name='administered_med_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='administered',
+            constraint=models.UniqueConstraint(fields=('medication', 'scheduled_time'), name='administered_unique_dose'),
+        ),
+    ]
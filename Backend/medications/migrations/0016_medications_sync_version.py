@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0015_administered_dose_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medications',
+            name='sync_version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, help_text='Change version of the last write to the row'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Q
+from django.utils import timezone
+
+
+def backfill_dose_occurrences(apps, schema_editor):
+    """
+    Materializes the rolling horizon for regimens that were not saved since
+    the occurrence table was added, which the post_save signal never reached.
+    """
+    from medications.schedule import iter_dose_times, next_dose_time
+
+    Medications = apps.get_model('medications', 'Medications')
+    DoseOccurrence = apps.get_model('medications', 'DoseOccurrence')
+    db_alias = schema_editor.connection.alias
+
+    now = timezone.now()
+    horizon = now + timedelta(days=settings.DOSE_OCCURRENCE_HORIZON_DAYS)
+    running = Medications.objects.using(db_alias).filter(patient_number__is_archived=False).filter(
+        Q(Medication_end_date__isnull=True) | Q(Medication_end_date__gte=timezone.localdate(now))
+    )
+
+    batch = []
+    for medication in running.iterator(chunk_size=1000):
+        doses = list(iter_dose_times(medication, now, horizon))
+        if not doses:
+            # As DoseOccurrenceManager.build: a sparse regimen keeps its next dose
+            first_dose = next_dose_time(medication, now - timedelta(microseconds=1))
+            if first_dose is not None:
+                doses = list(iter_dose_times(medication, first_dose, first_dose + timedelta(microseconds=1)))
+        batch.extend(DoseOccurrence(medication=medication, due_at=due_at, slot=slot) for slot, due_at in doses)
+        if len(batch) >= 1000:
+            DoseOccurrence.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    DoseOccurrence.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medications', '0016_medications_sync_version'),
+        ('patients', '0010_patients_active_ward_bed_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_dose_occurrences, migrations.RunPython.noop),
+    ]
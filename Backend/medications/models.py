@@ -1,7 +1,15 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, router, transaction
+from functools import reduce
+from operator import or_
+from django.db.models import F, Max, OuterRef, Q, Subquery
 from patients.models import Patients
-from datetime import date, timedelta, time, datetime
+from sync.models import SyncVersionedModel, mark_changed
+from datetime import date, timedelta
 from django.utils import timezone
+from .next_dose import cached_next_dose_times
+from .schedule import dose_slot, iter_dose_times, next_dose_time
 
 Medications_Choices = (
     ('Oral', 'Oral'),
@@ -39,8 +47,35 @@ Medication_form_Choices = (
     ('Other', 'Other')
 )
 
+Dose_status_Choices = (
+    ('scheduled', 'Scheduled'),
+    ('administered', 'Administered'),
+    ('missed', 'Missed'),
+)
+
+
+class MedicationsQuerySet(models.QuerySet):
+    def with_next_dose(self, now=None):
+        """
+        Annotates ``next_due_at`` with the first pending DoseOccurrence after
+        ``now``, an indexed lookup instead of recomputing the schedule per row.
+        """
+        next_occurrence = DoseOccurrence.objects.filter(
+            medication=OuterRef('pk'),
+            status='scheduled',
+            due_at__gt=now or timezone.now(),
+        ).order_by('due_at').values('due_at')[:1]
+        # Regimens of archived patients have no next dose
+        return self.annotate(
+            next_due_at=Subquery(next_occurrence),
+            patient_archived=F('patient_number__is_archived'),
+        )
 
-class Medications(models.Model):
+    def of_active_patients(self):
+        return self.filter(patient_number__is_archived=False)
+
+
+class Medications(SyncVersionedModel):
     physicianID = models.CharField(
         max_length=100, 
         blank=False,
@@ -106,62 +141,281 @@ class Medications(models.Model):
         help_text='Frequency type for medication administration'
     )
 
+    objects = MedicationsQuerySet.as_manager()
+
     class Meta:
         db_table = 'Medications'
         unique_together = ('patient_number', 'schedule_id')
 
     def save(self, *args, **kwargs):
         if not self.schedule_id:
-            # Get the maximum schedule_id for the given patient_number
-            last_schedule = Medications.objects.filter(patient_number=self.patient_number).order_by('-schedule_id').first()
-            self.schedule_id = (last_schedule.schedule_id + 1) if last_schedule else 1
+            self.schedule_id = ScheduleCounter.objects.allocate(self.patient_number_id)[0]
         super().save(*args, **kwargs)
     
     def get_next_dose_time(self):
         """
-        Returns the next datetime when the medication should be administered.
+        Returns the next datetime when the medication should be administered,
+        or None while the patient is archived.
         """
-        if not self.Frequency or not self.Medication_start_date:
+        if self.patient_number.is_archived:
             return None
+        return cached_next_dose_times([self])[0]
+    
+    def __str__(self):
+        return f"{self.Medication_name} ({self.Medication_form}) - {self.patient_number}"
+    
+class ScheduleCounterManager(models.Manager):
+    def allocate(self, patient_number, count=1):
+        """
+        Reserves ``count`` consecutive schedule_ids for the patient and returns
+        them as a range. One upsert statement increments the patient's counter
+        row (creating it from the highest existing schedule_id on first use)
+        and returns the new value, so concurrent orders never get the same id.
+        """
+        using = router.db_for_write(self.model)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        counter_table = quote(self.model._meta.db_table)
+        medications_table = quote(Medications._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {counter_table} ({quote('patient_number')}, {quote('last_schedule_id')})
+                SELECT %s, COALESCE(MAX({quote('schedule_id')}), 0) + %s
+                FROM {medications_table} WHERE {quote('patient_number')} = %s
+                ON CONFLICT ({quote('patient_number')}) DO UPDATE
+                SET {quote('last_schedule_id')} = {counter_table}.{quote('last_schedule_id')} + %s
+                RETURNING {quote('last_schedule_id')}
+                """,
+                [patient_number, count, patient_number, count],
+            )
+            last_schedule_id = cursor.fetchone()[0]
+        return range(last_schedule_id - count + 1, last_schedule_id + 1)
+
+
+class ScheduleCounter(models.Model):
+    patient_number = models.OneToOneField(
+        Patients,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='patient_number'
+    )
+    last_schedule_id = models.IntegerField(
+        default=0,
+        help_text='Highest schedule_id handed out for the patient'
+    )
 
-        # Use Medication_Time or default to midnight
-        med_time = self.Medication_Time or time(0, 0)
+    objects = ScheduleCounterManager()
 
-        # Combine start date with time and make timezone-aware
-        start_datetime = timezone.make_aware(datetime.combine(self.Medication_start_date, med_time))
-        now = timezone.now()
+    class Meta:
+        db_table = 'ScheduleCounter'
 
-        # If current time is before first dose, return it directly
-        if now < start_datetime:
-            return start_datetime
+    def __str__(self):
+        return f"{self.patient_number_id}: {self.last_schedule_id}"
 
-        elapsed = now - start_datetime
-        if self.Frequency.total_seconds() == 0:
-            return start_datetime  # Avoid division by zero
 
-        intervals_passed = int(elapsed.total_seconds() // self.Frequency.total_seconds()) + 1
-        next_dose = start_datetime + (self.Frequency * intervals_passed)
+class AdministeredManager(models.Manager):
+    def record(self, doses):
+        """
+        Stores unsaved Administered doses and marks their occurrences
+        administered, in one transaction and a fixed number of statements.
+
+        A dose is identified by its medication and scheduled_time, so retries
+        and two nurses recording the same dose leave a single record; the
+        first one stored wins. Returns the stored records in the order of
+        ``doses`` and the keys that were newly recorded.
+        """
+        keys = [(dose.medication_id, dose.scheduled_time) for dose in doses]
+        by_key = reduce(or_, (Q(medication_id=m, scheduled_time=t) for m, t in keys))
+        occurrence_by_key = reduce(or_, (Q(medication_id=m, due_at=t) for m, t in keys))
+        with transaction.atomic():
+            existing = set(self.filter(by_key).order_by().values_list('medication_id', 'scheduled_time'))
+            self.bulk_create(doses, ignore_conflicts=True)
+            DoseOccurrence.objects.bulk_create(
+                [
+                    DoseOccurrence(
+                        medication=dose.medication,
+                        due_at=dose.scheduled_time,
+                        slot=dose_slot(dose.medication, dose.scheduled_time) or 0,
+                        status='administered',
+                    )
+                    for dose in doses
+                ],
+                ignore_conflicts=True,
+            )
+            DoseOccurrence.objects.filter(occurrence_by_key).exclude(status='administered').update(status='administered')
+            stored = {
+                (record.medication_id, record.scheduled_time): record
+                for record in self.filter(by_key).select_related('medication')
+            }
+            created = set(keys) - existing
+            if created:
+                # The regimens' next dose moved on; /api/sync/ clients need them again
+                mark_changed(Medications.objects.filter(pk__in={medication_id for medication_id, _ in created}))
+        return [stored[key] for key in keys], created
 
-        if self.Medication_end_date:
-            end_datetime = timezone.make_aware(datetime.combine(self.Medication_end_date, time(23, 59)))
-            if next_dose > end_datetime:
-                return None
 
-        return next_dose
-    
-    def __str__(self):
-        return f"{self.Medication_name} ({self.Medication_form}) - {self.patient_number}"
-    
 class Administered(models.Model):
     medication = models.ForeignKey(
         Medications,
         related_name='administered_doses',
         on_delete=models.CASCADE
     )
+    scheduled_time = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Due time of the dose that was given; identifies the dose occurrence'
+    )
     administered_time = models.DateTimeField(default=timezone.now)
+    administered_by = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text='ID of the nurse who administered the dose'
+    )
+
+    objects = AdministeredManager()
 
     class Meta:
         ordering = ['-administered_time']
+        constraints = [
+            models.UniqueConstraint(fields=['medication', 'scheduled_time'], name='administered_unique_dose'),
+        ]
+        indexes = [
+            models.Index(fields=['medication', 'administered_time'], name='administered_med_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.medication.Medication_name} administered at {self.administered_time}"
+
+class DoseOccurrenceQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(status='scheduled')
+
+    def between(self, start, end):
+        return self.filter(due_at__gte=start, due_at__lt=end)
+
+
+class DoseOccurrenceManager(models.Manager.from_queryset(DoseOccurrenceQuerySet)):
+    def build(self, medication, start, end):
+        """
+        Returns unsaved occurrences of the medication due in ``[start, end)``.
+        The first dose after ``start`` is always included, even past ``end``,
+        so the next dose of a sparse regimen is never missing from the table.
+        """
+        occurrences = [
+            self.model(medication=medication, due_at=due_at, slot=slot)
+            for slot, due_at in iter_dose_times(medication, start, end)
+        ]
+        if not occurrences:
+            first_dose = next_dose_time(medication, start - timedelta(microseconds=1))
+            if first_dose is not None:
+                occurrences = [
+                    self.model(medication=medication, due_at=due_at, slot=slot)
+                    for slot, due_at in iter_dose_times(medication, first_dose, first_dose + timedelta(microseconds=1))
+                ]
+        return occurrences
+
+    def regenerate(self, medication, now=None):
+        """
+        Replaces the pending occurrences of the medication from ``now`` to the
+        end of the rolling horizon. Past and already administered occurrences
+        are kept; an archived patient's regimen gets no new ones.
+        """
+        now = now or timezone.now()
+        horizon = now + timedelta(days=settings.DOSE_OCCURRENCE_HORIZON_DAYS)
+        with transaction.atomic():
+            self.filter(medication=medication, due_at__gte=now).pending().delete()
+            if not medication.patient_number.is_archived:
+                self.bulk_create(self.build(medication, now, horizon), ignore_conflicts=True)
+
+    def generate(self, medications, now=None):
+        """
+        Creates the occurrences of the given regimens in one statement, for
+        callers that bypass post_save (bulk_create, unarchiving patients).
+        """
+        now = now or timezone.now()
+        horizon = now + timedelta(days=settings.DOSE_OCCURRENCE_HORIZON_DAYS)
+        occurrences = [
+            occurrence
+            for medication in medications
+            if not medication.patient_number.is_archived
+            for occurrence in self.build(medication, now, horizon)
+        ]
+        self.bulk_create(occurrences, ignore_conflicts=True)
+
+    def extend_horizon(self, now=None, batch_size=1000):
+        """
+        Tops up every running regimen so its occurrences reach the end of the
+        rolling horizon. Returns the number of occurrences generated.
+        """
+        now = now or timezone.now()
+        horizon = now + timedelta(days=settings.DOSE_OCCURRENCE_HORIZON_DAYS)
+        generated_until = dict(
+            self.filter(due_at__gte=now)
+            .values_list('medication')
+            .annotate(last_due_at=Max('due_at'))
+        )
+
+        running = Medications.objects.of_active_patients().filter(
+            models.Q(Medication_end_date__isnull=True) | models.Q(Medication_end_date__gte=timezone.localdate(now))
+        )
+        created = 0
+        batch = []
+        for medication in running.iterator(chunk_size=batch_size):
+            last_due_at = generated_until.get(medication.pk)
+            start = last_due_at + timedelta(microseconds=1) if last_due_at else now
+            if start < horizon:
+                batch.extend(self.build(medication, start, horizon))
+            if len(batch) >= batch_size:
+                created += len(self.bulk_create(batch, ignore_conflicts=True))
+                batch = []
+        if batch:
+            created += len(self.bulk_create(batch, ignore_conflicts=True))
+        return created
+
+    def top_up(self, now=None):
+        """
+        Runs extend_horizon at most once every DOSE_OCCURRENCE_TOP_UP_MINUTES
+        across processes sharing the cache, so the readers of the table keep
+        the horizon rolling without a scheduled job. Returns the number of
+        occurrences generated.
+        """
+        if not cache.add('dose-occurrences:topped-up', True, settings.DOSE_OCCURRENCE_TOP_UP_MINUTES * 60):
+            return 0
+        return self.extend_horizon(now)
+
+
+class DoseOccurrence(models.Model):
+    medication = models.ForeignKey(
+        Medications,
+        related_name='occurrences',
+        on_delete=models.CASCADE
+    )
+    due_at = models.DateTimeField(
+        db_index=True,
+        help_text='Date and time when the dose is due'
+    )
+    slot = models.PositiveIntegerField(
+        default=0,
+        help_text='Daily slot for fixed frequencies, interval number for Other'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Dose_status_Choices,
+        default='scheduled',
+        help_text='Whether the dose is still pending, given or missed'
+    )
+
+    objects = DoseOccurrenceManager()
+
+    class Meta:
+        db_table = 'DoseOccurrence'
+        ordering = ['due_at']
+        unique_together = ('medication', 'due_at')
+        indexes = [
+            models.Index(fields=['status', 'due_at'], name='doseoccurrence_status_due'),
+        ]
 
     def __str__(self):
-        return f"{self.medication.Medication_name} administered at {self.administered_time}"
\ No newline at end of file
+        return f"{self.medication.Medication_name} due at {self.due_at}"
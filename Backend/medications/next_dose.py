@@ -0,0 +1,60 @@
+import hashlib
+import math
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from MediSync.metrics import registry
+from .schedule import batch_next_dose_times
+
+# The fields next_dose_time reads
+SCHEDULE_FIELDS = ('Medication_start_date', 'Medication_end_date', 'Medication_Time', 'Frequency_type', 'Frequency')
+
+# Cached "no further dose" results, which only an edit can change
+_NONE = 'none'
+
+
+def next_dose_cache_key(medication):
+    # Keyed by the schedule itself, so an edited regimen never reads the
+    # entry computed before the edit, whichever path changed it
+    schedule = repr(tuple(getattr(medication, field) for field in SCHEDULE_FIELDS))
+    return f"next-dose:{medication.pk}:{hashlib.md5(schedule.encode()).hexdigest()}"
+
+
+def _timeout(due_at, now):
+    if due_at is None:
+        return settings.NEXT_DOSE_CACHE_TIMEOUT
+    # Rounded down so an entry never outlives its dose
+    return math.floor((due_at - now).total_seconds())
+
+
+def cached_next_dose_times(medications, now=None):
+    """
+    batch_next_dose_times backed by the cache: each regimen's next dose is
+    kept until the moment it falls due, then recomputed. Only the misses are
+    computed, in one vectorized pass. Hits and misses are counted in the
+    request metrics registry. An explicit ``now`` bypasses the cache.
+    """
+    medications = list(medications)
+    if now is not None:
+        return batch_next_dose_times(medications, now)
+
+    now = timezone.now()
+    keys = [next_dose_cache_key(medication) for medication in medications]
+    cached = cache.get_many(keys)
+    missing = [medication for medication, key in zip(medications, keys) if key not in cached]
+    registry.increment('next_dose_cache_hits', len(medications) - len(missing))
+    registry.increment('next_dose_cache_misses', len(missing))
+
+    if missing:
+        for medication, due_at in zip(missing, batch_next_dose_times(missing, now)):
+            key = next_dose_cache_key(medication)
+            cached[key] = _NONE if due_at is None else due_at
+            timeout = _timeout(due_at, now)
+            if timeout > 0:
+                cache.set(key, cached[key], timeout)
+
+    return [None if cached[key] == _NONE else cached[key] for key in keys]
+
+
+def forget_next_dose(medication):
+    cache.delete(next_dose_cache_key(medication))
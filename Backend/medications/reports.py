@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import time, timedelta
+from itertools import islice
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import Administered, Medications
+from .schedule import dose_datetime, expected_dose_times, wall_clock
+
+ADHERENCE_GROUP_COLUMNS = {
+    'patient': ('patient_number', 'first_name', 'last_name', 'ward', 'room_number'),
+    'ward': ('ward',),
+}
+ADHERENCE_COUNT_COLUMNS = ('expected', 'on_time', 'late', 'missed', 'pending', 'adherence')
+
+
+def classify_doses(expected, scheduled, administered, now, window):
+    """
+    Compares one regimen's expected due times with its administration
+    records, all as wall-clock datetime64 arrays; ``scheduled`` is sorted and
+    ``administered`` aligned with it. A dose given within ``window`` of its due
+    time is on time, later is late. A dose not given is missed once its window
+    has passed, pending until then. Returns (on_time, late, missed, pending).
+    """
+    if scheduled.size:
+        index = np.minimum(np.searchsorted(scheduled, expected), scheduled.size - 1)
+        given = scheduled[index] == expected
+        on_time = given & (administered[index] - expected <= window)
+    else:
+        given = on_time = np.zeros(expected.size, dtype=bool)
+    pending = ~given & (expected + window > now)
+    return (
+        int(on_time.sum()),
+        int((given & ~on_time).sum()),
+        int((~given & ~pending).sum()),
+        int(pending.sum()),
+    )
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def adherence_report(start, end, group='patient', ward=None, patient_number=None, now=None, chunk_size=500):
+    """
+    Yields one adherence row per patient, or per ward, for the doses due from
+    ``start`` to ``end`` (inclusive dates) up to ``now``.
+
+    Expected doses are derived from each regimen's frequency and dates and
+    matched against Administered records with vectorized comparisons.
+    Regimens are read ``chunk_size`` at a time in group order, with one query
+    for each chunk's administrations, so memory stays bounded by the chunk
+    size rather than the report length.
+    """
+    now = now or timezone.now()
+    range_start = dose_datetime(start, time(0, 0))
+    range_end = min(dose_datetime(end + timedelta(days=1), time(0, 0)), now)
+    now64 = wall_clock(now)
+    window = np.timedelta64(settings.ADHERENCE_ON_TIME_MINUTES * 60_000_000, 'us')
+    columns = ADHERENCE_GROUP_COLUMNS[group]
+
+    regimens = (
+        Medications.objects
+        .filter(Medication_start_date__lte=end)
+        .filter(Q(Medication_end_date__isnull=True) | Q(Medication_end_date__gte=start))
+        .select_related('patient_number')
+    )
+    if ward:
+        regimens = regimens.filter(patient_number__ward=ward)
+    if patient_number:
+        regimens = regimens.filter(patient_number=patient_number)
+    if group == 'ward':
+        regimens = regimens.order_by('patient_number__ward', 'id')
+    else:
+        regimens = regimens.order_by('patient_number', 'id')
+
+    row = None
+    for chunk in _chunks(regimens.iterator(chunk_size=chunk_size), chunk_size):
+        records = defaultdict(list)
+        for medication_id, scheduled_time, administered_time in (
+            Administered.objects
+            .filter(medication__in=chunk, scheduled_time__gte=range_start, scheduled_time__lt=range_end)
+            .order_by('medication_id', 'scheduled_time')
+            .values_list('medication_id', 'scheduled_time', 'administered_time')
+        ):
+            records[medication_id].append((wall_clock(scheduled_time), wall_clock(administered_time)))
+
+        for medication in chunk:
+            patient = medication.patient_number
+            key = tuple(getattr(patient, column) for column in columns)
+            if row is None or key != tuple(row[column] for column in columns):
+                if row is not None:
+                    yield _finish(row)
+                row = {**dict(zip(columns, key)), 'expected': 0, 'on_time': 0, 'late': 0, 'missed': 0, 'pending': 0}
+
+            expected = expected_dose_times(medication, range_start, range_end)
+            given = np.array(records.get(medication.pk, []), dtype='datetime64[us]').reshape(-1, 2)
+            on_time, late, missed, pending = classify_doses(expected, given[:, 0], given[:, 1], now64, window)
+            row['expected'] += expected.size
+            row['on_time'] += on_time
+            row['late'] += late
+            row['missed'] += missed
+            row['pending'] += pending
+
+    if row is not None:
+        yield _finish(row)
+
+
+def _finish(row):
+    settled = row['on_time'] + row['late'] + row['missed']
+    row['adherence'] = round(100 * (row['on_time'] + row['late']) / settled, 1) if settled else None
+    return row
@@ -0,0 +1,258 @@
+from datetime import datetime, time, timedelta
+import numpy as np
+from django.utils import timezone
+
+FREQUENCY_TYPE_TIMES = {
+    'OD': [time(8, 0)],
+    'BID': [time(8, 0), time(18, 0)],
+    'TID': [time(8, 0), time(13, 0), time(18, 0)],
+    'QID': [time(8, 0), time(12, 0), time(16, 0), time(20, 0)],
+}
+
+
+def dose_datetime(day, dose_time):
+    """Combines a date and a time into an aware datetime in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, dose_time))
+
+
+def regimen_start(medication):
+    """
+    Returns the first instant a dose may fall on. Fixed frequencies start at
+    midnight of the start date, 'Other' frequencies at Medication_Time.
+    """
+    if medication.Frequency_type in FREQUENCY_TYPE_TIMES:
+        return dose_datetime(medication.Medication_start_date, time(0, 0))
+    return dose_datetime(medication.Medication_start_date, medication.Medication_Time or time(0, 0))
+
+
+def regimen_end(medication):
+    """Returns the last instant a dose may fall on, or None for open-ended regimens."""
+    if not medication.Medication_end_date:
+        return None
+    return dose_datetime(medication.Medication_end_date, time(23, 59, 59))
+
+
+def next_dose_time(medication, now=None):
+    """
+    Returns the first dose of the medication strictly after ``now``, or None
+    once the regimen has ended.
+    """
+    now = timezone.localtime(now or timezone.now())
+
+    if not medication.Medication_start_date:
+        return None
+
+    # Handle fixed frequency types like OD, BID, TID, QID
+    if medication.Frequency_type in FREQUENCY_TYPE_TIMES:
+        dose_times = FREQUENCY_TYPE_TIMES[medication.Frequency_type]
+
+        # Every day has at least one slot, so the next dose is on the later of
+        # today and the start date, or the day after.
+        first_date = max(medication.Medication_start_date, now.date())
+        for day_offset in range(0, 2):
+            current_date = first_date + timedelta(days=day_offset)
+
+            # Check if current_date is past the end date
+            if medication.Medication_end_date and current_date > medication.Medication_end_date:
+                return None
+
+            for dose_time in dose_times:
+                due_at = dose_datetime(current_date, dose_time)
+                if due_at > now:
+                    return due_at
+
+        return None
+
+    # Custom 'Other' frequency using timedelta
+    frequency = medication.Frequency
+    if not frequency or frequency.total_seconds() == 0:
+        return None
+
+    start_datetime = regimen_start(medication)
+    if now < start_datetime:
+        return start_datetime
+
+    elapsed = now - start_datetime
+    intervals_passed = int(elapsed.total_seconds() // frequency.total_seconds()) + 1
+    next_dose = start_datetime + (frequency * intervals_passed)
+
+    end_datetime = regimen_end(medication)
+    if end_datetime and next_dose > end_datetime:
+        return None
+
+    return next_dose
+
+
+def _time_offset(value):
+    return np.timedelta64(
+        ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond, 'us'
+    )
+
+
+FREQUENCY_TYPE_OFFSETS = {
+    frequency_type: np.array([_time_offset(t) for t in dose_times], dtype='timedelta64[us]')
+    for frequency_type, dose_times in FREQUENCY_TYPE_TIMES.items()
+}
+END_OF_DAY = _time_offset(time(23, 59, 59))
+
+
+def batch_next_dose_times(medications, now=None):
+    """
+    Vectorized next_dose_time for many medications against one shared ``now``.
+    Returns a list aligned with ``medications`` and matches next_dose_time
+    exactly. All arithmetic happens on local wall-clock datetime64 values,
+    which is what the per-row version does with aware datetimes sharing the
+    current timezone.
+    """
+    medications = list(medications)
+    now = timezone.localtime(now or timezone.now())
+    now64 = np.datetime64(now.replace(tzinfo=None), 'us')
+    today = np.datetime64(now.date(), 'D')
+
+    start = np.array(
+        [m.Medication_start_date or 'NaT' for m in medications], dtype='datetime64[D]'
+    )
+    end = np.array(
+        [m.Medication_end_date or 'NaT' for m in medications], dtype='datetime64[D]'
+    )
+    frequency_types = np.array([m.Frequency_type for m in medications], dtype=object)
+    result = np.full(len(medications), np.datetime64('NaT'), dtype='datetime64[us]')
+    has_start = ~np.isnat(start)
+    open_ended = np.isnat(end)
+
+    # Fixed frequencies: the first slot after now on the later of today and
+    # the start date, or the day after, that does not fall past the end date
+    for frequency_type, offsets in FREQUENCY_TYPE_OFFSETS.items():
+        rows = np.flatnonzero(has_start & (frequency_types == frequency_type))
+        if not rows.size:
+            continue
+        first_date = np.maximum(start[rows], today)
+        days = first_date[:, None] + np.arange(2).astype('timedelta64[D]')
+        candidates = (days[:, :, None] + offsets).reshape(len(rows), -1)
+        day_of_candidate = np.repeat(days, len(offsets), axis=1)
+        valid = (candidates > now64) & (
+            open_ended[rows, None] | (day_of_candidate <= end[rows, None])
+        )
+        found = valid.any(axis=1)
+        first = valid.argmax(axis=1)
+        result[rows[found]] = candidates[found, first[found]]
+
+    # 'Other': one interval formula for every row
+    rows = np.flatnonzero(has_start & ~np.isin(frequency_types, list(FREQUENCY_TYPE_OFFSETS)))
+    frequency = np.array(
+        [medications[i].Frequency // timedelta(microseconds=1) if medications[i].Frequency else 0 for i in rows],
+        dtype=np.int64,
+    )
+    rows, frequency = rows[frequency != 0], frequency[frequency != 0]
+    if rows.size:
+        med_time = np.array(
+            [_time_offset(medications[i].Medication_Time or time(0, 0)) for i in rows], dtype='timedelta64[us]'
+        )
+        start_datetime = start[rows] + med_time
+        elapsed = (now64 - start_datetime).astype(np.int64)
+        # Same float floor division as timedelta.total_seconds() // ...
+        intervals_passed = np.floor_divide(elapsed / 1e6, frequency / 1e6).astype(np.int64) + 1
+        next_dose = start_datetime + (frequency * intervals_passed).astype('timedelta64[us]')
+        past_end = ~open_ended[rows] & (next_dose > end[rows] + END_OF_DAY)
+        next_dose = np.where(past_end, np.datetime64('NaT'), next_dose)
+        # Before the first dose the start itself is next, end date or not
+        result[rows] = np.where(now64 < start_datetime, start_datetime, next_dose)
+
+    current_timezone = timezone.get_current_timezone()
+    return [
+        None if due_at is None else timezone.make_aware(due_at, current_timezone)
+        for due_at in result.tolist()
+    ]
+
+
+def iter_dose_times(medication, start, end):
+    """
+    Yields ``(slot, due_at)`` for every dose of the medication due in
+    ``[start, end)``, in chronological order. For fixed frequencies the slot is
+    the index into FREQUENCY_TYPE_TIMES, for 'Other' it is the number of
+    intervals since the first dose.
+    """
+    if not medication.Medication_start_date:
+        return
+
+    end_datetime = regimen_end(medication)
+    if end_datetime and end_datetime < end:
+        end = end_datetime + timedelta(microseconds=1)
+
+    start = max(start, regimen_start(medication))
+    if start >= end:
+        return
+
+    if medication.Frequency_type in FREQUENCY_TYPE_TIMES:
+        dose_times = FREQUENCY_TYPE_TIMES[medication.Frequency_type]
+        current_date = timezone.localtime(start).date()
+        last_date = timezone.localtime(end).date()
+        while current_date <= last_date:
+            for slot, dose_time in enumerate(dose_times):
+                due_at = dose_datetime(current_date, dose_time)
+                if start <= due_at < end:
+                    yield slot, due_at
+            current_date += timedelta(days=1)
+        return
+
+    frequency = medication.Frequency
+    if not frequency or frequency.total_seconds() == 0:
+        return
+
+    first_dose = regimen_start(medication)
+    # Ceiling division: the first interval at or after ``start``
+    slot = max(0, -((first_dose - start) // frequency))
+    due_at = first_dose + frequency * slot
+    while due_at < end:
+        yield slot, due_at
+        slot += 1
+        due_at += frequency
+
+
+def wall_clock(value):
+    """Returns an aware datetime as a local wall-clock datetime64[us]."""
+    return np.datetime64(timezone.localtime(value).replace(tzinfo=None), 'us')
+
+
+def expected_dose_times(medication, start, end):
+    """
+    Vectorized iter_dose_times: returns the due times of every dose of the
+    medication in ``[start, end)`` as a sorted datetime64[us] array of local
+    wall-clock times.
+    """
+    empty = np.array([], dtype='datetime64[us]')
+    if not medication.Medication_start_date:
+        return empty
+
+    end_datetime = regimen_end(medication)
+    if end_datetime and end_datetime < end:
+        end = end_datetime + timedelta(microseconds=1)
+    start = max(start, regimen_start(medication))
+    if start >= end:
+        return empty
+    start64, end64 = wall_clock(start), wall_clock(end)
+
+    if medication.Frequency_type in FREQUENCY_TYPE_OFFSETS:
+        days = np.arange(
+            start64.astype('datetime64[D]'), end64.astype('datetime64[D]') + 1, dtype='datetime64[D]'
+        )
+        due = (days[:, None] + FREQUENCY_TYPE_OFFSETS[medication.Frequency_type]).ravel()
+        return due[(due >= start64) & (due < end64)]
+
+    frequency = medication.Frequency
+    if not frequency or frequency.total_seconds() == 0:
+        return empty
+    step = frequency // timedelta(microseconds=1)
+    first_dose = wall_clock(regimen_start(medication))
+    # Ceiling division: the first interval at or after ``start``
+    first_slot = max(0, -(-(start64 - first_dose).astype(np.int64) // step))
+    last_slot = -(-(end64 - first_dose).astype(np.int64) // step)
+    slots = np.arange(first_slot, max(first_slot, last_slot), dtype=np.int64)
+    return first_dose + (slots * step).astype('timedelta64[us]')
+
+
+def dose_slot(medication, due_at):
+    """Returns the slot of the dose due exactly at ``due_at``, or None if no dose is due then."""
+    for slot, _ in iter_dose_times(medication, due_at, due_at + timedelta(microseconds=1)):
+        return slot
+    return None
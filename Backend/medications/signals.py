@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from MediSync.caching import invalidate_list_cache
+from patients.signals import patients_archived
+from .models import Medications, DoseOccurrence
+from .next_dose import forget_next_dose
+
+
+@receiver(post_save, sender=Medications)
+def regenerate_dose_occurrences(sender, instance, raw=False, **kwargs):
+    """Keeps the materialized dose schedule in step with the regimen."""
+    if raw:
+        return
+    DoseOccurrence.objects.regenerate(instance)
+
+
+@receiver(post_save, sender=Medications)
+@receiver(post_delete, sender=Medications)
+def invalidate_medications_list(sender, **kwargs):
+    invalidate_list_cache('medications')
+
+
+@receiver(post_delete, sender=Medications)
+def forget_cached_next_dose(sender, instance, **kwargs):
+    # An edit needs nothing here: the cache key follows the schedule fields
+    forget_next_dose(instance)
+
+
+@receiver(patients_archived)
+def sync_dose_occurrences(sender, patient_numbers, archived, **kwargs):
+    """
+    Archiving drops the pending future doses of the patients' regimens, so
+    they leave the upcoming list, alerts and next dose times; unarchiving
+    generates them again.
+    """
+    now = timezone.now()
+    if archived:
+        DoseOccurrence.objects.pending().filter(
+            medication__patient_number__in=patient_numbers, due_at__gte=now
+        ).delete()
+    else:
+        medications = Medications.objects.filter(
+            patient_number__in=patient_numbers
+        ).select_related('patient_number')
+        DoseOccurrence.objects.generate(medications, now)
+    invalidate_list_cache('medications')
@@ -1,9 +1,25 @@
+import json
+import random
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from medications.models import Medications
+from medications.models import Administered, Medications, DoseOccurrence, ScheduleCounter
+from medications.management.commands.bench import compare
+from medications.alerts import AlertSubscription, DoseAlertScheduler, collect_due_alerts, scheduler
+from medications.api.views import MedicationsViewSet, alert_events
+from medications.board import current_shift, ward_board
+from medications.next_dose import cached_next_dose_times, next_dose_cache_key
+from MediSync.metrics import registry
+from MediSync.testing import asgi_get
+from medications.reports import adherence_report
+from medications.schedule import batch_next_dose_times, expected_dose_times, iter_dose_times, next_dose_time
 from patients.models import Patients
+from logs.models import Logs
 from datetime import date, time, timedelta, datetime
 from django.utils import timezone
 
@@ -48,6 +64,26 @@ class MedicationsAPITestCase(TestCase):
 
         self.client = APIClient()
 
+    def test_list_cache_expires_at_next_dose(self):
+        cache.clear()
+        url = reverse('medications-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        due_at = timezone.now() + timedelta(seconds=90)
+        timeout = MedicationsViewSet().get_list_cache_timeout([{'next_dose_time': due_at}, {'next_dose_time': None}])
+        self.assertLessEqual(timeout, 90)
+
+        self.medication.Medication_notes = "Take after meals"
+        self.medication.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_list_sparse_fields(self):
+        response = self.client.get(reverse('medications-list'), {'fields': 'schedule_id,Medication_name,next_dose_time'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'schedule_id', 'Medication_name', 'next_dose_time'})
+        self.assertEqual(response.data[0]['next_dose_time'], self.medication.get_next_dose_time())
+
     def test_schedule_id_auto_generation(self):
         medication = Medications.objects.create(
             Medication_name="Ibuprofen",
@@ -65,6 +101,16 @@ class MedicationsAPITestCase(TestCase):
         self.assertIsNotNone(medication.schedule_id)
         self.assertEqual(medication.schedule_id, self.medication.schedule_id + 1)
 
+    def test_schedule_id_block_reservation(self):
+        block = ScheduleCounter.objects.allocate(self.patient.patient_number, count=3)
+        self.assertEqual(list(block), [self.medication.schedule_id + n for n in (1, 2, 3)])
+        self.assertEqual(ScheduleCounter.objects.allocate(self.patient.patient_number)[0], block[-1] + 1)
+
+    def test_schedule_counter_seeds_from_existing_ids(self):
+        ScheduleCounter.objects.all().delete()
+        Medications.objects.filter(pk=self.medication.pk).update(schedule_id=41)
+        self.assertEqual(list(ScheduleCounter.objects.allocate(self.patient.patient_number)), [42])
+
     def test_create_medication(self):
         url = reverse('medications-create')
         data = {
@@ -84,6 +130,44 @@ class MedicationsAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Medications.objects.count(), 2)
 
+    def bulk_item(self, **overrides):
+        return {
+            "physicianID": "DOC-1",
+            "patient_number": self.patient.patient_number,
+            "Medication_name": "Paracetamol",
+            "Medication_strength": 500,
+            "Medication_Time": "09:00:00",
+            "Medication_start_date": str(date.today()),
+            "Medication_end_date": str(date.today() + timedelta(days=5)),
+            "Frequency_type": "TID",
+            **overrides,
+        }
+
+    def test_bulk_create_medications(self):
+        items = [self.bulk_item(), self.bulk_item(Medication_name="Omeprazole", Frequency_type="Other", hour=6)]
+        response = self.client.post(reverse('medications-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = Medications.objects.filter(schedule_id__gt=self.medication.schedule_id).order_by('schedule_id')
+        self.assertEqual([m.schedule_id for m in created], [self.medication.schedule_id + 1, self.medication.schedule_id + 2])
+        self.assertEqual(created[1].Frequency, timedelta(hours=6))
+        self.assertTrue(DoseOccurrence.objects.filter(medication=created[0]).exists())
+        self.assertEqual(Logs.objects.filter(log_type="CREATION").count(), 2)
+
+    def test_bulk_create_is_all_or_nothing_by_default(self):
+        items = [self.bulk_item(), self.bulk_item(Medication_strength="strong")]
+        response = self.client.post(reverse('medications-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual(Medications.objects.count(), 1)
+
+    def test_bulk_create_partial_keeps_valid_items(self):
+        items = [self.bulk_item(), self.bulk_item(Medication_strength="strong")]
+        response = self.client.post(reverse('medications-bulk') + '?partial=true', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Medications.objects.count(), 2)
+
     def test_retrieve_medication(self):
         url = reverse('medications-detail', kwargs={
             'patient_number': self.patient.patient_number,
@@ -232,4 +316,557 @@ class MedicationsAPITestCase(TestCase):
         intervals_passed = int(elapsed_seconds // freq_seconds) + 1
         expected_next_dose = start_datetime + timedelta(seconds=intervals_passed * freq_seconds)
 
-        self.assertEqual(next_dose, expected_next_dose)
\ No newline at end of file
+        self.assertEqual(next_dose, expected_next_dose)
+
+class DoseOccurrenceTestCase(TestCase):
+    def setUp(self):
+        self.patient = Patients.objects.create(
+            first_name="Jane",
+            last_name="Roe",
+            age=40,
+            sex='F',
+            contact_number=1234567890,
+            date_of_birth="1985-05-05",
+            room_number=202,
+            bed_number=1,
+        )
+        self.today = timezone.localdate()
+        self.medication = Medications.objects.create(
+            physicianID="DOC-1",
+            Medication_name="Metformin",
+            Medication_strength=500,
+            Medication_Time=time(8, 0),
+            patient_number=self.patient,
+            Medication_start_date=self.today,
+            Medication_end_date=self.today + timedelta(days=2),
+            Frequency_type='BID'
+        )
+
+    def test_occurrences_generated_on_create(self):
+        occurrences = list(self.medication.occurrences.values_list('due_at', flat=True))
+        now = timezone.now()
+        expected = [
+            timezone.make_aware(datetime.combine(self.today + timedelta(days=d), t))
+            for d in range(3) for t in (time(8, 0), time(18, 0))
+        ]
+        self.assertEqual(occurrences, [dt for dt in expected if dt >= now])
+
+    def test_archiving_patient_drops_pending_doses(self):
+        now = timezone.now()
+        self.patient.is_archived = True
+        self.patient.save()
+        self.assertFalse(self.medication.occurrences.pending().filter(due_at__gte=now).exists())
+        self.assertIsNone(Medications.objects.get(pk=self.medication.pk).get_next_dose_time())
+
+        response = APIClient().get(reverse('medications-list'), {'patient_number': self.patient.patient_number})
+        self.assertIsNone(response.data[0]['next_dose_time'])
+        self.assertEqual(Medications.objects.of_active_patients().count(), 0)
+
+        response = APIClient().post(
+            reverse('patients-bulk-archive'),
+            {'patient_numbers': [self.patient.patient_number], 'archived': False},
+            format='json',
+        )
+        self.assertEqual(response.data['patient_numbers'], [self.patient.patient_number])
+        self.assertEqual(
+            self.medication.occurrences.pending().filter(due_at__gte=now).first().due_at,
+            Medications.objects.get(pk=self.medication.pk).get_next_dose_time(),
+        )
+
+    def test_occurrences_regenerated_on_update(self):
+        self.medication.Frequency_type = 'OD'
+        self.medication.save()
+        due_times = {timezone.localtime(dt).time() for dt in self.medication.occurrences.values_list('due_at', flat=True)}
+        self.assertTrue(due_times <= {time(8, 0)})
+
+    def test_occurrences_removed_with_medication(self):
+        self.medication.delete()
+        self.assertFalse(DoseOccurrence.objects.exists())
+
+    def test_sparse_regimen_keeps_next_dose(self):
+        medication = Medications.objects.create(
+            physicianID="DOC-1",
+            Medication_name="Vitamin D",
+            Medication_strength=1000,
+            Medication_Time=time(9, 0),
+            patient_number=self.patient,
+            Medication_start_date=self.today + timedelta(days=30),
+            Medication_end_date=None,
+            Frequency_type='Other',
+            Frequency=timedelta(days=30)
+        )
+        self.assertEqual(
+            list(medication.occurrences.values_list('due_at', flat=True)),
+            [medication.get_next_dose_time()]
+        )
+
+    def test_extend_horizon_tops_up_schedule(self):
+        self.medication.Medication_end_date = None
+        self.medication.save()
+        DoseOccurrence.objects.filter(due_at__gt=timezone.now() + timedelta(days=1)).delete()
+        self.assertGreater(DoseOccurrence.objects.extend_horizon(), 0)
+        last_due_at = self.medication.occurrences.order_by('-due_at').first().due_at
+        self.assertGreater(last_due_at, timezone.now() + timedelta(days=6))
+
+    def test_upcoming_tops_up_horizon_once_per_interval(self):
+        cache.clear()
+        self.medication.Medication_end_date = None
+        self.medication.save()
+        # A regimen the post_save signal has not reached since its horizon ran out
+        DoseOccurrence.objects.all().delete()
+        params = {'to': (timezone.now() + timedelta(days=3)).isoformat()}
+        response = APIClient().get(reverse('medications-upcoming'), params)
+        self.assertGreaterEqual(len(response.data), 5)
+
+        DoseOccurrence.objects.all().delete()
+        response = APIClient().get(reverse('medications-upcoming'), params)
+        self.assertEqual(response.data, [])
+
+    def test_list_uses_next_occurrence(self):
+        response = APIClient().get(reverse('medications-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data[0]['next_dose_time'],
+            timezone.localtime(self.medication.get_next_dose_time())
+        )
+
+    def test_upcoming_returns_doses_in_window(self):
+        tomorrow = self.today + timedelta(days=1)
+        params = {
+            'from': timezone.make_aware(datetime.combine(tomorrow, time(7, 0))).isoformat(),
+            'to': timezone.make_aware(datetime.combine(tomorrow, time(9, 0))).isoformat(),
+        }
+        response = APIClient().get(reverse('medications-upcoming'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        dose = response.data[0]
+        self.assertEqual(dose['schedule_id'], self.medication.schedule_id)
+        self.assertEqual(dose['last_name'], "Roe")
+        self.assertEqual(dose['room_number'], 202)
+
+    def test_upcoming_filters_by_ward(self):
+        self.patient.ward = "ICU"
+        self.patient.save()
+        params = {'to': (timezone.now() + timedelta(days=3)).isoformat()}
+        response = APIClient().get(reverse('medications-upcoming'), {**params, 'ward': "ER"})
+        self.assertEqual(response.data, [])
+        response = APIClient().get(reverse('medications-upcoming'), {**params, 'ward': "ICU"})
+        self.assertEqual(len(response.data), self.medication.occurrences.count())
+
+    def test_upcoming_rejects_bad_window(self):
+        response = APIClient().get(reverse('medications-upcoming'), {'from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_calendar_expands_every_dose_by_day(self):
+        DoseOccurrence.objects.filter(medication=self.medication).update(status='administered')
+        params = {'start': self.today.isoformat(), 'end': (self.today + timedelta(days=5)).isoformat()}
+        response = APIClient().get(reverse('medications-calendar'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        days = response.data['days']
+        self.assertEqual(list(days), [(self.today + timedelta(days=d)).isoformat() for d in range(3)])
+        self.assertEqual([dose['time'] for dose in days[self.today.isoformat()]], [time(8, 0), time(18, 0)])
+        self.assertEqual(days[self.today.isoformat()][0]['last_name'], "Roe")
+        last_day = days[(self.today + timedelta(days=2)).isoformat()]
+        self.assertEqual([dose['status'] for dose in last_day], ['administered', 'administered'])
+
+    def test_calendar_rejects_oversized_range(self):
+        params = {'start': '2025-01-01', 'end': '2025-12-31'}
+        response = APIClient().get(reverse('medications-calendar'), params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DoseAlertTestCase(TestCase):
+    def setUp(self):
+        self.patient = Patients.objects.create(
+            first_name="Ana",
+            last_name="Cruz",
+            age=52,
+            sex='F',
+            contact_number=1234567890,
+            date_of_birth="1973-03-03",
+            room_number=303,
+            bed_number=2,
+            ward="ICU",
+        )
+        self.medication = Medications.objects.create(
+            physicianID="DOC-2",
+            Medication_name="Heparin",
+            Medication_strength=5000,
+            Medication_Time=time(8, 0),
+            patient_number=self.patient,
+            Medication_start_date=timezone.localdate(),
+            Medication_end_date=None,
+            Frequency_type='QID'
+        )
+        self.dose = self.medication.occurrences.first()
+
+    def test_collect_due_alerts_per_lead(self):
+        alerts = collect_due_alerts(self.dose.due_at - timedelta(minutes=30))
+        self.assertEqual([(a['id'], a['lead_minutes']) for a in alerts], [(self.dose.id, 30)])
+        alerts = collect_due_alerts(self.dose.due_at - timedelta(minutes=60, seconds=30))
+        self.assertEqual([(a['id'], a['lead_minutes']) for a in alerts], [(self.dose.id, 60)])
+
+    def test_subscription_filters(self):
+        alert = collect_due_alerts(self.dose.due_at - timedelta(minutes=60))[0]
+        self.assertTrue(AlertSubscription.from_params({'ward': 'ICU,ER'}).matches(alert))
+        self.assertFalse(AlertSubscription.from_params({'ward': 'ER'}).matches(alert))
+        self.assertFalse(AlertSubscription.from_params({'room': '101'}).matches(alert))
+        self.assertFalse(AlertSubscription.from_params({'lead': '30'}).matches(alert))
+
+    def test_scheduler_emits_each_alert_once(self):
+        alert_scheduler = DoseAlertScheduler()
+        subscription = AlertSubscription()
+        alert_scheduler.subscriptions.add(subscription)
+        now = self.dose.due_at - timedelta(minutes=30)
+        alerts = collect_due_alerts(now)
+        alert_scheduler.publish(alerts, now=now)
+        alert_scheduler.publish(alerts, now=now)
+        self.assertEqual(subscription.queue.qsize(), 1)
+
+    async def test_stream_sends_alert_events(self):
+        subscription = AlertSubscription()
+        events = alert_events(subscription)
+        self.assertTrue((await events.__anext__()).startswith("retry:"))
+        subscription.queue.put_nowait({'id': 7, 'lead_minutes': 30, 'ward': ''})
+        event = await events.__anext__()
+        self.assertIn("event: dose-alert\nid: 7-30\n", event)
+        await events.aclose()
+        scheduler._task.cancel()
+        self.assertNotIn(subscription, scheduler.subscriptions)
+
+
+class MedPassTestCase(TestCase):
+    """Three patients on a twice-daily regimen that started yesterday."""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.medications = []
+        for number in range(3):
+            patient = Patients.objects.create(
+                first_name=f"Nurse{number}",
+                last_name="Round",
+                age=50,
+                sex='F',
+                contact_number=1234567890,
+                date_of_birth="1975-01-01",
+                room_number=500 + number,
+            )
+            self.medications.append(Medications.objects.create(
+                physicianID="DOC-2",
+                Medication_name="Losartan",
+                Medication_strength=50,
+                Medication_Time=time(8, 0),
+                patient_number=patient,
+                Medication_start_date=self.today - timedelta(days=1),
+                Medication_end_date=None,
+                Frequency_type='BID',
+            ))
+        self.medication = self.medications[0]
+        self.yesterday_evening = timezone.make_aware(datetime.combine(self.today - timedelta(days=1), time(18, 0)))
+        self.client = APIClient()
+
+
+class AdministerTestCase(MedPassTestCase):
+    def administer_url(self, medication):
+        return reverse('medications-administer', args=[medication.patient_number_id, medication.schedule_id])
+
+    def test_administer_is_idempotent(self):
+        data = {'scheduled_time': self.yesterday_evening.isoformat(), 'administered_by': 'RN-7'}
+        response = self.client.post(self.administer_url(self.medication), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['schedule_id'], self.medication.schedule_id)
+
+        retry = self.client.post(self.administer_url(self.medication), data, format='json')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data['id'], response.data['id'])
+        self.assertEqual(Administered.objects.count(), 1)
+        self.assertEqual(Logs.objects.filter(log_type='ADMINISTRATION').count(), 1)
+        occurrence = DoseOccurrence.objects.get(medication=self.medication, due_at=self.yesterday_evening)
+        self.assertEqual(occurrence.status, 'administered')
+
+    def test_administer_rejects_unscheduled_time(self):
+        data = {'scheduled_time': (self.yesterday_evening + timedelta(minutes=30)).isoformat()}
+        response = self.client.post(self.administer_url(self.medication), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('medications-administer', args=[9999, 1]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_administer_rejects_future_dose(self):
+        future_dose = self.yesterday_evening + timedelta(days=300)
+        response = self.client.post(
+            self.administer_url(self.medication), {'scheduled_time': future_dose.isoformat()}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('early', response.data['error'])
+        self.assertFalse(Administered.objects.exists())
+        self.assertEqual(DoseOccurrence.objects.filter(status='administered').count(), 0)
+
+    def test_administering_next_dose_advances_next_dose_time(self):
+        next_due = self.medication.get_next_dose_time()
+        with mock.patch('django.utils.timezone.now', return_value=next_due - timedelta(minutes=10)):
+            self.client.post(self.administer_url(self.medication), {'scheduled_time': next_due.isoformat()}, format='json')
+        response = self.client.get(reverse('medications-list'), {'patient_number': self.medication.patient_number_id})
+        self.assertGreater(response.data[0]['next_dose_time'], next_due)
+
+    def test_bulk_round_is_one_transaction(self):
+        items = [
+            {
+                'patient_number': medication.patient_number_id,
+                'schedule_id': medication.schedule_id,
+                'scheduled_time': self.yesterday_evening.isoformat(),
+                'administered_by': 'RN-7',
+            }
+            for medication in self.medications
+        ]
+        url = reverse('medications-administer-bulk')
+        # The same statements whatever the size of the round
+        with self.assertNumQueries(13):
+            response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['administered']), 3)
+        self.assertEqual(DoseOccurrence.objects.filter(status='administered').count(), 3)
+
+        # A retried round records nothing new
+        response = self.client.post(url, items, format='json')
+        self.assertEqual(Administered.objects.count(), 3)
+        self.assertEqual(Logs.objects.filter(log_type='ADMINISTRATION').count(), 3)
+
+    def test_bulk_round_rejects_invalid_items(self):
+        items = [
+            {'patient_number': self.medication.patient_number_id, 'schedule_id': self.medication.schedule_id,
+             'scheduled_time': self.yesterday_evening.isoformat()},
+            {'patient_number': self.medication.patient_number_id, 'schedule_id': 99},
+        ]
+        url = reverse('medications-administer-bulk')
+        response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Administered.objects.exists())
+
+        response = self.client.post(url + '?partial=true', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(Administered.objects.count(), 1)
+
+
+class AdherenceReportTestCase(MedPassTestCase):
+    def setUp(self):
+        super().setUp()
+        self.yesterday = self.today - timedelta(days=1)
+        self.noon = timezone.make_aware(datetime.combine(self.today, time(12, 0)))
+        morning = timezone.make_aware(datetime.combine(self.yesterday, time(8, 0)))
+        Administered.objects.record([
+            Administered(medication=self.medication, scheduled_time=morning,
+                         administered_time=morning + timedelta(hours=2)),
+            Administered(medication=self.medication, scheduled_time=self.yesterday_evening,
+                         administered_time=self.yesterday_evening + timedelta(minutes=10)),
+        ])
+
+    def test_counts_per_patient(self):
+        rows = list(adherence_report(self.yesterday, self.today, now=self.noon))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            {key: rows[0][key] for key in ('patient_number', 'expected', 'on_time', 'late', 'missed', 'pending', 'adherence')},
+            {'patient_number': self.medication.patient_number_id, 'expected': 3, 'on_time': 1, 'late': 1,
+             'missed': 1, 'pending': 0, 'adherence': 66.7},
+        )
+        self.assertEqual(rows[1]['missed'], 3)
+
+    def test_counts_per_ward_and_pending_window(self):
+        rows = list(adherence_report(
+            self.yesterday, self.today, group='ward', now=self.noon.replace(hour=8, minute=10)
+        ))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['expected'], rows[0]['missed'], rows[0]['pending']), (9, 4, 3))
+
+    def test_streams_csv_and_ndjson(self):
+        url = reverse('medications-adherence')
+        response = self.client.get(url, {'start': self.yesterday.isoformat()})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'patient_number,first_name,last_name,ward,room_number,expected,on_time,late,missed,pending,adherence')
+        self.assertEqual(len(lines), 4)
+
+        response = self.client.get(url, {'output': 'ndjson', 'group': 'ward'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(rows[0]['ward'], '')
+
+        response = self.client.get(url, {'start': '2020-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streams_under_asgi(self):
+        status_code, bodies, warnings = asgi_get(
+            reverse('medications-adherence'), f'start={self.yesterday.isoformat()}&output=ndjson'
+        )
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(warnings, [])
+        self.assertEqual(len(b''.join(bodies).splitlines()), 3)
+
+
+class WardBoardTestCase(MedPassTestCase):
+    def setUp(self):
+        super().setUp()
+        tomorrow = self.today + timedelta(days=1)
+        self.now = timezone.make_aware(datetime.combine(tomorrow, time(7, 0)))
+        self.morning_dose = timezone.make_aware(datetime.combine(tomorrow, time(8, 0)))
+        Patients.objects.filter(pk=self.medications[2].patient_number_id).update(ward="B")
+        DoseOccurrence.objects.filter(medication=self.medication, due_at=self.morning_dose).update(status='administered')
+
+    def test_current_shift(self):
+        start, end = current_shift(self.now)
+        self.assertEqual((start.hour, end.hour), (6, 14))
+        start, end = current_shift(self.now - timedelta(hours=8))
+        self.assertEqual((start.hour, end.hour, (end - start).total_seconds()), (22, 6, 8 * 3600))
+
+    def test_board_groups_beds_in_one_query(self):
+        with self.assertNumQueries(1):
+            board = ward_board(now=self.now)
+        self.assertEqual([ward['ward'] for ward in board['wards']], ["", "B"])
+        self.assertEqual([room['room_number'] for room in board['wards'][0]['rooms']], [500, 501])
+
+        given, pending = (room['beds'][0] for room in board['wards'][0]['rooms'])
+        self.assertEqual((given['doses_this_shift'], given['pending_this_shift']), (1, 0))
+        evening_dose = DoseOccurrence.objects.filter(medication=self.medication, due_at__gt=self.morning_dose).first()
+        self.assertEqual(given['next_dose']['id'], evening_dose.pk)
+        self.assertEqual((pending['doses_this_shift'], pending['pending_this_shift']), (1, 1))
+        self.assertEqual(pending['next_dose']['due_at'], self.morning_dose)
+        self.assertEqual(pending['next_dose']['Medication_name'], "Losartan")
+
+    def test_board_endpoint_filters_ward(self):
+        response = self.client.get(reverse('ward-board'), {'ward': 'B'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([ward['ward'] for ward in response.data['wards']], ["B"])
+
+
+class NextDoseCacheTestCase(MedPassTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_entries_expire_when_the_dose_falls_due(self):
+        with mock.patch('medications.next_dose.cache.set', wraps=cache.set) as cache_set:
+            first = cached_next_dose_times(self.medications)
+        self.assertEqual(first, batch_next_dose_times(self.medications))
+        remaining = (first[0] - timezone.now()).total_seconds()
+        timeout = cache_set.call_args_list[0].args[2]
+        self.assertTrue(remaining - 2 <= timeout <= remaining)
+
+        self.assertEqual(cached_next_dose_times(self.medications), first)
+        self.assertEqual(registry.counters(), {'next_dose_cache_hits': 3, 'next_dose_cache_misses': 3})
+        self.assertIn('medisync_next_dose_cache_hits_total 3', registry.render())
+
+    def test_edit_and_delete_invalidate(self):
+        cached_next_dose_times([self.medication])
+        key = next_dose_cache_key(self.medication)
+        self.medication.Frequency_type = 'TID'
+        self.medication.save()
+        self.assertNotEqual(next_dose_cache_key(self.medication), key)
+        self.assertEqual(cached_next_dose_times([self.medication]), batch_next_dose_times([self.medication]))
+        self.assertEqual(registry.counters()['next_dose_cache_misses'], 2)
+
+        key = next_dose_cache_key(self.medication)
+        self.medication.delete()
+        self.assertIsNone(cache.get(key))
+
+
+class BatchNextDoseTestCase(TestCase):
+    def test_batch_matches_per_row_logic(self):
+        rng = random.Random(20250601)
+        today = timezone.localdate()
+        patient = Patients(patient_number=1)
+        medications = []
+        for _ in range(500):
+            start = today + timedelta(days=rng.randint(-60, 10))
+            end = rng.choice([None, start + timedelta(days=rng.randint(0, 90)), start - timedelta(days=1)])
+            medications.append(Medications(
+                patient_number=patient,
+                Medication_name="Test",
+                Medication_strength=1,
+                Medication_Time=rng.choice([None, time(rng.randint(0, 23), rng.choice([0, 15, 30, 45]))]),
+                Medication_start_date=start,
+                Medication_end_date=end,
+                Frequency_type=rng.choice(['OD', 'BID', 'TID', 'QID', 'Other']),
+                Frequency=rng.choice([None, timedelta(0), timedelta(hours=rng.randint(1, 72), minutes=rng.choice([0, 30]))]),
+            ))
+
+        now = timezone.now()
+        moments = [now, now.replace(microsecond=0), timezone.make_aware(datetime.combine(today, time(8, 0)))]
+        for moment in moments:
+            self.assertEqual(
+                batch_next_dose_times(medications, moment),
+                [next_dose_time(m, moment) for m in medications],
+            )
+
+    def test_expected_dose_times_match_iter_dose_times(self):
+        rng = random.Random(20250602)
+        today = timezone.localdate()
+        patient = Patients(patient_number=1)
+        for _ in range(300):
+            start = today + timedelta(days=rng.randint(-60, 10))
+            medication = Medications(
+                patient_number=patient,
+                Medication_Time=rng.choice([None, time(rng.randint(0, 23), rng.choice([0, 30]))]),
+                Medication_start_date=start,
+                Medication_end_date=rng.choice([None, start + timedelta(days=rng.randint(0, 40))]),
+                Frequency_type=rng.choice(['OD', 'BID', 'TID', 'QID', 'Other']),
+                Frequency=rng.choice([None, timedelta(hours=rng.randint(1, 72))]),
+            )
+            range_start = timezone.now() - timedelta(days=rng.randint(0, 50), minutes=rng.randint(0, 1000))
+            range_end = range_start + timedelta(days=rng.randint(0, 30), seconds=rng.randint(0, 90000))
+            self.assertEqual(
+                [timezone.make_aware(due_at) for due_at in expected_dose_times(medication, range_start, range_end).tolist()],
+                [due_at for _, due_at in iter_dose_times(medication, range_start, range_end)],
+            )
+
+    def test_list_serializer_batches_rows_without_occurrences(self):
+        patient = Patients.objects.create(
+            first_name="Lee",
+            last_name="Tan",
+            age=60,
+            sex='M',
+            contact_number=1234567890,
+            date_of_birth="1965-01-01",
+            room_number=404,
+        )
+        medication = Medications.objects.create(
+            physicianID="DOC-3",
+            Medication_name="Amlodipine",
+            Medication_strength=5,
+            Medication_Time=time(6, 0),
+            patient_number=patient,
+            Medication_start_date=timezone.localdate(),
+            Medication_end_date=None,
+            Frequency_type='Other',
+            Frequency=timedelta(hours=12),
+        )
+        medication.occurrences.all().delete()
+        response = APIClient().get(reverse('medications-list'))
+        self.assertEqual(response.data[0]['next_dose_time'], medication.get_next_dose_time())
+
+
+class BenchCommandTestCase(TestCase):
+    def test_reports_every_scenario(self):
+        out = StringIO()
+        call_command(
+            'bench', '--no-isolate', '--patients', '3', '--regimens', '5', '--logs', '10',
+            '--iterations', '2', '--warmup', '0', stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            set(report['scenarios']),
+            {'patients-list', 'medications-list', 'patients-by-number', 'logs-list',
+             'medications-create', 'next-dose', 'next-dose-batch'},
+        )
+        self.assertEqual(Medications.objects.filter(Frequency_type='Other').count(), 3)
+        for metrics in report['scenarios'].values():
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+            self.assertGreaterEqual(metrics['queries'], 1)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'scenarios': {'logs-list': {'p95_ms': 10.0, 'queries': 1}}}
+        results = {'scenarios': {
+            'logs-list': {'p50_ms': 5.0, 'p95_ms': 11.0, 'p99_ms': 12.0, 'queries': 2, 'peak_memory_kb': 1.0},
+        }}
+        self.assertEqual(len(compare(results, baseline, threshold=0.2)), 1)
+        self.assertEqual(len(compare(results, baseline, threshold=0.05)), 2)
+
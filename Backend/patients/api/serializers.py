@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from MediSync.fieldsets import SparseFieldsetSerializerMixin
+from MediSync.metrics import TimedListSerializer, TimedSerializerMixin
 from ..models import Patients, Emergencycontactdetails
 
 class EmergencycontactdetailsModelSerializer(serializers.ModelSerializer):
@@ -8,13 +10,14 @@ class EmergencycontactdetailsModelSerializer(serializers.ModelSerializer):
         model = Emergencycontactdetails
         fields = '__all__'
 
-class PatientsModelSerializer(serializers.ModelSerializer):
+class PatientsModelSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     emergency_contact = EmergencycontactdetailsModelSerializer(source='emergencycontactdetails')
     BMI = serializers.SerializerMethodField()
 
     class Meta:
         model = Patients
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         try:
@@ -57,3 +60,7 @@ class PatientsModelSerializer(serializers.ModelSerializer):
                 return None
         return None
 
+
+class BulkArchiveSerializer(serializers.Serializer):
+    patient_numbers = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    archived = serializers.BooleanField(default=True)
@@ -1,13 +1,70 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from ..models import Patients
-from .serializers import PatientsModelSerializer
+from ..search import search_patients
+from ..signals import patients_archived
+from .serializers import BulkArchiveSerializer, PatientsModelSerializer
+from django.db import transaction
 from django.utils import timezone
+from MediSync.caching import CachedListMixin, invalidate_list_cache
+from MediSync.fieldsets import SparseFieldsetMixin
+from sync.models import mark_changed
 
-class PatientsViewSet(viewsets.ModelViewSet):
-    queryset = Patients.objects.all()
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def filter_archived(queryset, archived):
+    # Active and archived patients are listed separately, each along its own partial index
+    if archived == 'false':
+        return queryset.active()
+    if archived == 'true':
+        return queryset.archived()
+    if archived == 'all':
+        return queryset
+    raise ValidationError({"error": "'archived' must be one of true, false or all."})
+
+class PatientsViewSet(CachedListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
+    # The emergency contact is nested in every row; join it instead of one query per patient
+    queryset = Patients.objects.select_related('emergencycontactdetails')
     serializer_class = PatientsModelSerializer
+    list_cache_namespace = 'patients'
+    expandable_fields = ('emergency_contact',)
+    sparse_field_dependencies = {'BMI': ('height', 'weight')}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        archived = self.request.query_params.get('archived', 'false')
+        queryset = filter_archived(queryset, archived)
+        if archived == 'false':
+            return queryset.order_by('last_name', 'first_name', 'patient_number')
+        if archived == 'true':
+            return queryset.order_by('-date_archived')
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Ranked patient lookup by name, patient number, room or diagnosis:
+        ``?q=`` is required, ``?limit=`` caps the results (default 20, at
+        most 100) and ``?archived=`` narrows them as in the list (default all).
+        """
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response({"error": "'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            return Response({"error": "'limit' must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+        queryset = filter_archived(self.get_queryset(), request.query_params.get('archived', 'all'))
+        serializer = self.get_serializer(search_patients(queryset, q, limit), many=True)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='by-number/(?P<patient_number>[^/.]+)')
     def get_by_patient_number(self, request, patient_number=None):
@@ -36,3 +93,32 @@ class PatientsViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-archive')
+    def bulk_archive(self, request):
+        """
+        Archives, or with ``"archived": false`` unarchives, the patients in
+        ``patient_numbers`` with a single UPDATE.
+        """
+        serializer = BulkArchiveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        patient_numbers = serializer.validated_data['patient_numbers']
+        archived = serializer.validated_data['archived']
+
+        with transaction.atomic():
+            patients = Patients.objects.filter(patient_number__in=patient_numbers).exclude(is_archived=archived)
+            changed = list(patients.values_list('patient_number', flat=True))
+            Patients.objects.filter(patient_number__in=changed).update(
+                is_archived=archived,
+                date_archived=timezone.now() if archived else None,
+            )
+            if changed:
+                # The UPDATE sends no post_save
+                invalidate_list_cache('patients')
+                patients_archived.send(sender=Patients, patient_numbers=changed, archived=archived)
+                mark_changed(Patients.objects.filter(patient_number__in=changed))
+
+        return Response(
+            {'status': 'archived' if archived else 'active', 'patient_numbers': changed},
+            status=status.HTTP_200_OK,
+        )
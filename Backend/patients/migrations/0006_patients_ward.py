@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_alter_patients_final_diagnosis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patients',
+            name='ward',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Ward or nursing unit the patient is assigned to', max_length=100),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0006_patients_ward'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patients',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['last_name', 'first_name', 'patient_number'], name='patients_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patients',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['room_number', 'bed_number'], name='patients_active_room_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patients',
+            index=models.Index(condition=models.Q(('is_archived', True)), fields=['-date_archived'], name='patients_archived_date_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+# Columns matched by substring in patients.search; the expressions mirror the
+# UPPER("column"::text) LIKE ... that icontains compiles to on PostgreSQL
+TRIGRAM_COLUMNS = ('first_name', 'middle_name', 'last_name', 'admitting_diagnosis', 'Final_diagnosis')
+
+
+def trigram_index_name(column):
+    return f'patients_{column.lower()}_trgm_idx'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {trigram_index_name(column)} '
+            f'ON "Patients" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {trigram_index_name(column)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0007_patients_active_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patients',
+            index=models.Index(fields=['room_number'], name='patients_room_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0008_patients_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patients',
+            name='sync_version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, help_text='Change version of the last write to the row'),
+        ),
+    ]
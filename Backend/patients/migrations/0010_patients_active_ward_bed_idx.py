@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0009_patients_sync_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patients',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['ward', 'room_number', 'bed_number'], name='patients_active_ward_bed_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from sync.models import SyncVersionedModel
 
 Blood_Group_Choices = (
     ('A+', 'A+'),
@@ -40,7 +41,15 @@ class Emergencycontactdetails(models.Model):
     class Meta:
         db_table = 'EmergencyContactDetails'
 
-class Patients(models.Model):
+class PatientsQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_archived=False)
+
+    def archived(self):
+        return self.filter(is_archived=True)
+
+
+class Patients(SyncVersionedModel):
     first_name = models.CharField(
         max_length=100,
         help_text='Patient\'s first name'
@@ -104,6 +113,13 @@ class Patients(models.Model):
         blank=False,
         help_text='Patient\'s assigned bed number'
     )
+    ward = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='Ward or nursing unit the patient is assigned to'
+    )
     religion = models.CharField(
         max_length=100,
         blank=True,
@@ -139,6 +155,15 @@ class Patients(models.Model):
         help_text='Date and time when the patient record was archived'
     )
 
+    objects = PatientsQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save can tell whether the archive state changed
+        instance._loaded_is_archived = instance.__dict__.get('is_archived')
+        return instance
+
     def clean(self):
         super().clean()
         # Validate diet format
@@ -161,4 +186,30 @@ class Patients(models.Model):
         super().save(*args, **kwargs)
 
     class Meta:
-        db_table = 'Patients'
\ No newline at end of file
+        db_table = 'Patients'
+        # Live screens only ever read active patients; keep their indexes
+        # free of the archived backlog
+        indexes = [
+            models.Index(
+                fields=['last_name', 'first_name', 'patient_number'],
+                condition=models.Q(is_archived=False),
+                name='patients_active_name_idx',
+            ),
+            models.Index(
+                fields=['room_number', 'bed_number'],
+                condition=models.Q(is_archived=False),
+                name='patients_active_room_idx',
+            ),
+            models.Index(
+                fields=['-date_archived'],
+                condition=models.Q(is_archived=True),
+                name='patients_archived_date_idx',
+            ),
+            models.Index(
+                fields=['ward', 'room_number', 'bed_number'],
+                condition=models.Q(is_archived=False),
+                name='patients_active_ward_bed_idx',
+            ),
+            # Search matches rooms across archived patients too
+            models.Index(fields=['room_number'], name='patients_room_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,57 @@
+from functools import reduce
+from operator import add, and_
+from django.db.models import Case, IntegerField, Q, Value, When
+
+NAME_FIELDS = ('first_name', 'middle_name', 'last_name')
+DIAGNOSIS_FIELDS = ('admitting_diagnosis', 'Final_diagnosis')
+# Substring matches need a whole trigram to use the GIN indexes; shorter
+# terms only match the start of a name
+MIN_SUBSTRING_LENGTH = 3
+MAX_TERMS = 5
+
+
+def _any(fields, lookup, term):
+    return reduce(lambda q, field: q | Q(**{f'{field}__{lookup}': term}), fields, Q())
+
+
+def term_filter(term):
+    """Returns the condition one search term must meet, and its rank expression (lower is better)."""
+    ranks = []
+    if term.isdigit():
+        number = int(term)
+        ranks += [
+            When(patient_number=number, then=Value(0)),
+            When(room_number=number, then=Value(4)),
+        ]
+    ranks += [
+        When(last_name__iexact=term, then=Value(1)),
+        When(_any(NAME_FIELDS, 'istartswith', term), then=Value(2)),
+    ]
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        ranks += [
+            When(_any(NAME_FIELDS, 'icontains', term), then=Value(3)),
+            When(_any(DIAGNOSIS_FIELDS, 'icontains', term), then=Value(5)),
+        ]
+    condition = reduce(lambda q, when: q | when.condition, ranks, Q())
+    return condition, Case(*ranks, default=Value(9), output_field=IntegerField())
+
+
+def search_patients(queryset, q, limit):
+    """
+    Filters ``queryset`` to patients matching every whitespace-separated term
+    of ``q`` in their names, diagnoses, patient number or room, best matches
+    first: patient number, exact last name, name prefix, name substring,
+    room, then diagnosis.
+
+    The lookups compile to UPPER(column) LIKE, which the trigram GIN
+    expression indexes from migration 0008 serve on PostgreSQL; other
+    backends run the same query without them.
+    """
+    terms = q.split()[:MAX_TERMS]
+    conditions, ranks = zip(*(term_filter(term) for term in terms))
+    return (
+        queryset
+        .filter(reduce(and_, conditions))
+        .annotate(search_rank=reduce(add, ranks))
+        .order_by('search_rank', 'last_name', 'first_name', 'patient_number')[:limit]
+    )
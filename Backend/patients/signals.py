@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from MediSync.caching import invalidate_list_cache
+from .models import Patients, Emergencycontactdetails
+
+# Sent with ``patient_numbers`` and ``archived`` whenever patients are
+# archived or unarchived, including by queryset updates that bypass post_save.
+patients_archived = Signal()
+
+
+@receiver(post_save, sender=Patients)
+@receiver(post_delete, sender=Patients)
+@receiver(post_save, sender=Emergencycontactdetails)
+@receiver(post_delete, sender=Emergencycontactdetails)
+def invalidate_patients_list(sender, **kwargs):
+    invalidate_list_cache('patients')
+
+
+@receiver(post_save, sender=Patients)
+def announce_archive_change(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_loaded_is_archived', None) == instance.is_archived:
+        return
+    instance._loaded_is_archived = instance.is_archived
+    patients_archived.send(sender=Patients, patient_numbers=[instance.pk], archived=instance.is_archived)
@@ -1,9 +1,10 @@
-from django.test import TestCase
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from .models import Patients
+from .models import Patients, Emergencycontactdetails
 from datetime import date
+from decimal import Decimal
 
 class PatientsTests(APITestCase):
     def setUp(self):
@@ -68,3 +69,189 @@ class PatientsTests(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Patients.objects.count(), 1)
+
+
+class PatientsListCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.patient = Patients.objects.create(
+            first_name="John",
+            last_name="Doe",
+            sex='M',
+            bed_number=101,
+            age=45,
+            contact_number=1234567890,
+            date_of_birth=date(1980, 1, 1),
+            room_number=1
+        )
+        self.patients_url = reverse('patients-list')
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get(self.patients_url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.patients_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_save_invalidates_cached_list(self):
+        etag = self.client.get(self.patients_url)['ETag']
+        self.patient.first_name = "Jack"
+        self.patient.save()
+
+        response = self.client.get(self.patients_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['first_name'], "Jack")
+
+
+class PatientsSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for number in range(3):
+            patient = Patients.objects.create(
+                first_name=f"Patient{number}",
+                last_name="Doe",
+                sex='F',
+                bed_number=number + 1,
+                age=40,
+                contact_number=1234567890,
+                date_of_birth=date(1985, 1, 1),
+                room_number=200 + number,
+                height=1.75,
+                weight=70
+            )
+            Emergencycontactdetails.objects.create(
+                patient_number=patient,
+                first_name="Contact",
+                relation_to_patient="Sibling",
+                contact_number="09170000000"
+            )
+        self.patients_url = reverse('patients-list')
+
+    def test_list_joins_emergency_contacts(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.patients_url)
+        self.assertEqual(response.data[0]['emergency_contact']['first_name'], "Contact")
+
+    def test_fields_limits_payload(self):
+        response = self.client.get(self.patients_url, {'fields': 'first_name,room_number,BMI'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'first_name', 'room_number', 'BMI'})
+        self.assertEqual(response.data[0]['BMI'], Decimal('22.86'))
+
+    def test_expand_adds_nested_contact(self):
+        response = self.client.get(self.patients_url, {'fields': 'first_name', 'expand': 'emergency_contact'})
+        self.assertEqual(set(response.data[0]), {'first_name', 'emergency_contact'})
+        self.assertEqual(response.data[0]['emergency_contact']['relation_to_patient'], "Sibling")
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.patients_url, {'fields': 'first_name,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PatientsArchiveTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.patients = [
+            Patients.objects.create(
+                first_name=f"Patient{number}",
+                last_name="Doe",
+                sex='M',
+                bed_number=1,
+                age=50,
+                contact_number=1234567890,
+                date_of_birth=date(1975, 1, 1),
+                room_number=300 + number,
+                is_archived=number == 0
+            )
+            for number in range(3)
+        ]
+        self.patients_url = reverse('patients-list')
+
+    def test_list_defaults_to_active_patients(self):
+        response = self.client.get(self.patients_url)
+        self.assertEqual([p['first_name'] for p in response.data], ["Patient1", "Patient2"])
+
+        response = self.client.get(self.patients_url, {'archived': 'true'})
+        self.assertEqual([p['first_name'] for p in response.data], ["Patient0"])
+
+        response = self.client.get(self.patients_url, {'archived': 'all'})
+        self.assertEqual(len(response.data), 3)
+
+        response = self.client.get(self.patients_url, {'archived': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_archive(self):
+        numbers = [p.patient_number for p in self.patients]
+        response = self.client.post(reverse('patients-bulk-archive'), {'patient_numbers': numbers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['patient_numbers']), numbers[1:])
+        self.assertEqual(Patients.objects.active().count(), 0)
+        self.assertTrue(all(p.date_archived for p in Patients.objects.all()))
+        self.assertEqual(self.client.get(self.patients_url).data, [])
+
+        response = self.client.post(
+            reverse('patients-bulk-archive'), {'patient_numbers': numbers[:1], 'archived': False}, format='json'
+        )
+        self.assertEqual(Patients.objects.get(pk=numbers[0]).date_archived, None)
+        self.assertEqual(len(self.client.get(self.patients_url).data), 1)
+
+    def test_bulk_archive_requires_patient_numbers(self):
+        response = self.client.post(reverse('patients-bulk-archive'), {'patient_numbers': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('patients-bulk-archive'), {'patient_numbers': ["abc"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('patient_numbers', response.data['error'])
+        response = self.client.post(reverse('patients-bulk-archive'), {'patient_numbers': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PatientsSearchTests(APITestCase):
+    def setUp(self):
+        people = [
+            ("Maria", "Santos", 101, "Pneumonia", False),
+            ("Jose", "Santiago", 102, "Dengue fever", False),
+            ("Ana", "Reyes", 103, "Community-acquired pneumonia", True),
+        ]
+        self.patients = [
+            Patients.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                sex='F',
+                age=40,
+                contact_number=1234567890,
+                date_of_birth=date(1985, 1, 1),
+                room_number=room_number,
+                admitting_diagnosis=diagnosis,
+                is_archived=is_archived,
+            )
+            for first_name, last_name, room_number, diagnosis, is_archived in people
+        ]
+        self.search_url = reverse('patients-search')
+
+    def search(self, **params):
+        response = self.client.get(self.search_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [p['last_name'] for p in response.data]
+
+    def test_ranks_name_prefix_before_diagnosis(self):
+        self.assertEqual(self.search(q='santos'), ["Santos"])
+        self.assertEqual(self.search(q='sant'), ["Santiago", "Santos"])
+        self.assertEqual(self.search(q='pneumonia'), ["Reyes", "Santos"])
+        self.assertEqual(self.search(q='maria pneumonia'), ["Santos"])
+
+    def test_matches_number_and_room(self):
+        maria = self.patients[0]
+        self.assertEqual(self.search(q=str(maria.patient_number))[0], "Santos")
+        self.assertEqual(self.search(q='102'), ["Santiago"])
+
+    def test_archived_filter_and_limit(self):
+        self.assertEqual(self.search(q='pneumonia', archived='true'), ["Reyes"])
+        self.assertEqual(self.search(q='pneumonia', archived='false'), ["Santos"])
+        self.assertEqual(len(self.search(q='san', limit=1)), 1)
+
+    def test_requires_query(self):
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import SnapshotView, SyncView
+
+urlpatterns = [
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('snapshot/', SnapshotView.as_view(), name='snapshot'),
+]
@@ -0,0 +1,104 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from medications.api.serializers import MedicationsModelSerializer
+from medications.models import DoseOccurrence, Medications
+from patients.api.serializers import PatientsModelSerializer
+from patients.models import Patients
+from MediSync.caching import list_cache_generation
+from MediSync.routers import reading_from_replica
+from ..models import SyncCounter, Tombstone
+from ..signals import SYNCED_MODELS
+from ..snapshot import SNAPSHOT_ENCODINGS, SNAPSHOT_FORMATS, build_snapshot, encode_snapshot, negotiate_encoding
+
+
+class SyncView(APIView):
+    """
+    Returns the patients and medications created or changed since the
+    client's ``?since=`` token, the ids of those deleted, and the token to
+    send next time. Without a token, or with one older than the kept
+    tombstones, every row is returned with ``"full": true`` and the client
+    should replace what it holds.
+    """
+
+    def get(self, request):
+        since = request.query_params.get('since') or '0'
+        if not since.isdigit():
+            return Response({"error": "'since' must be a token returned by this endpoint."}, status=status.HTTP_400_BAD_REQUEST)
+        since = int(since)
+
+        # Read first: every change below the token has committed. Rows at or
+        # above it may be sent again next time, but never missed
+        token = SyncCounter.objects.token()
+        full = since == 0 or since > token or since <= SyncCounter.objects.current().pruned_version
+
+        patients = Patients.objects.select_related('emergencycontactdetails')
+        medications = Medications.objects.all()
+        deleted = {name: [] for name in SYNCED_MODELS.values()}
+        if not full:
+            patients = patients.filter(sync_version__gte=since)
+            medications = medications.filter(sync_version__gte=since)
+            tombstones = Tombstone.objects.filter(version__gte=since)
+            for model, object_id in tombstones.values_list('model', 'object_id'):
+                deleted[model].append(object_id)
+
+        context = {'request': request}
+        return Response({
+            'token': str(token),
+            'full': full,
+            'patients': PatientsModelSerializer(patients.order_by('sync_version'), many=True, context=context).data,
+            'medications': MedicationsModelSerializer(
+                medications.with_next_dose().order_by('sync_version'), many=True, context=context
+            ).data,
+            'deleted': deleted,
+        })
+
+
+class SnapshotView(APIView):
+    """
+    Everything a nurse station needs to cold-start in one compact download:
+    see sync.snapshot.build_snapshot. JSON by default, MessagePack with
+    ``?output=msgpack``; brotli or gzip compressed as Accept-Encoding allows.
+
+    Encoded bodies are cached per format and encoding until a patient or
+    medication write, or SNAPSHOT_CACHE_TIMEOUT seconds as the 24 hour dose
+    window moves on, and answer If-None-Match with 304.
+    """
+
+    def get(self, request):
+        output = request.query_params.get('output', 'json')
+        if output not in SNAPSHOT_FORMATS:
+            return Response({"error": "'output' must be json or msgpack."}, status=status.HTTP_400_BAD_REQUEST)
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+
+        key = 'snapshot:{}:{}:{}:{}'.format(
+            list_cache_generation('patients'), list_cache_generation('medications'), output, encoding,
+        )
+        cached = cache.get(key)
+        if cached is None:
+            DoseOccurrence.objects.top_up()
+            body = encode_snapshot(build_snapshot(), output)
+            etag = f'"{hashlib.md5(body).hexdigest()}{"-" + encoding if encoding else ""}"'
+            if encoding:
+                body = SNAPSHOT_ENCODINGS[encoding](body)
+            cached = (etag, body)
+            # As for cached lists, a lagging replica's snapshot is not stored
+            if not reading_from_replica():
+                cache.set(key, cached, settings.SNAPSHOT_CACHE_TIMEOUT)
+
+        etag, body = cached
+        if etag in {tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')}:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(body, content_type=SNAPSHOT_FORMATS[output])
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
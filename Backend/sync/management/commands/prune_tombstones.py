@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Clients with older tokens resync fully.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention in days (default: SYNC_TOMBSTONE_RETENTION_DAYS).')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.SYNC_TOMBSTONE_RETENTION_DAYS
+        count = Tombstone.objects.prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(f"Pruned {count} tombstones.")
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('pruned_version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'SyncCounter',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Synced model the row belonged to', max_length=50)),
+                ('object_id', models.CharField(help_text='Primary key of the deleted row', max_length=100)),
+                ('version', models.BigIntegerField(db_index=True, help_text='Change version of the deletion')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'Tombstone',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def retire_counter_tokens(apps, schema_editor):
+    """
+    On PostgreSQL versions become transaction ids, above every counter
+    version handed out so far. Marking them all pruned sends clients holding
+    an old token one full resync; existing rows keep their lower versions.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    SyncCounter = apps.get_model('sync', 'SyncCounter')
+    db_alias = schema_editor.connection.alias
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_current_xact_id()::text::bigint")
+        xid = cursor.fetchone()[0]
+    SyncCounter.objects.using(db_alias).update_or_create(pk=1, defaults={'pruned_version': xid})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(retire_counter_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,136 @@
+from django.db import connections, models, router, transaction
+
+
+class SyncCounterManager(models.Manager):
+    def allocate(self):
+        """
+        Returns the change version for the rows the current transaction
+        writes. Call it inside that transaction, after any other work in it.
+
+        On PostgreSQL the version is the transaction's id and no lock is
+        taken: token() only moves past a transaction once it has ended, so a
+        client never skips a change that had not committed when it synced.
+        Elsewhere it comes from the counter row, which stays locked until
+        commit so versions become visible in order; SQLite serializes
+        writers anyway.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_current_xact_id()::text::bigint")
+                return cursor.fetchone()[0]
+            quote = connection.ops.quote_name
+            table = quote(self.model._meta.db_table)
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({quote('id')}, {quote('version')}, {quote('pruned_version')}) VALUES (1, 1, 0)
+                ON CONFLICT ({quote('id')}) DO UPDATE
+                SET {quote('version')} = {table}.{quote('version')} + 1
+                RETURNING {quote('version')}
+                """
+            )
+            return cursor.fetchone()[0]
+
+    def token(self):
+        """
+        Returns the sync token: every change with a lower version has
+        committed. On PostgreSQL that is the oldest transaction still
+        running; rows of later transactions are sent again from it.
+        """
+        connection = connections[router.db_for_read(self.model)]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+                return cursor.fetchone()[0]
+        return self.current().version + 1
+
+    def current(self):
+        """Returns the counter as last committed, or a zeroed one before the first change."""
+        return self.filter(pk=1).first() or self.model(pk=1)
+
+
+class SyncCounter(models.Model):
+    """
+    The one row holding the last change version handed out, where versions
+    are not transaction ids, and the last pruned one.
+    """
+    version = models.BigIntegerField(default=0)
+    # Tombstones up to this version have been pruned
+    pruned_version = models.BigIntegerField(default=0)
+
+    objects = SyncCounterManager()
+
+    class Meta:
+        db_table = 'SyncCounter'
+
+    def __str__(self):
+        return str(self.version)
+
+
+class SyncVersionedModel(models.Model):
+    """
+    Stamps every save with a new change version, so /api/sync/ can return
+    only the rows changed since a client's token. Queryset update() and
+    bulk_create() bypass save(); call mark_changed() after them.
+    """
+    sync_version = models.BigIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        help_text='Change version of the last write to the row'
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            # Versioned last, so the post_save work (dose occurrences) is done
+            # before the counter row is locked for the rest of the transaction
+            self.sync_version = mark_changed(type(self)._base_manager.using(using).filter(pk=self.pk))
+
+
+def mark_changed(queryset):
+    """
+    Gives every row of ``queryset`` a new change version with one UPDATE and
+    returns it. Call it last in the transaction that changed the rows.
+    """
+    with transaction.atomic(using=queryset.db):
+        version = SyncCounter.objects.allocate()
+        queryset.update(sync_version=version)
+    return version
+
+
+class TombstoneQuerySet(models.QuerySet):
+    def prune(self, before):
+        """
+        Deletes tombstones recorded before ``before`` and remembers the
+        highest version removed, so older tokens are told to resync fully.
+        """
+        with transaction.atomic():
+            pruned = self.filter(deleted_at__lt=before)
+            last = pruned.aggregate(models.Max('version'))['version__max']
+            if last is None:
+                return 0
+            count, _ = pruned.delete()
+            SyncCounter.objects.get_or_create(pk=1)
+            SyncCounter.objects.filter(pk=1, pruned_version__lt=last).update(pruned_version=last)
+        return count
+
+
+class Tombstone(models.Model):
+    """Records a deleted synced row, so clients holding it can drop it."""
+    model = models.CharField(max_length=50, help_text='Synced model the row belonged to')
+    object_id = models.CharField(max_length=100, help_text='Primary key of the deleted row')
+    version = models.BigIntegerField(db_index=True, help_text='Change version of the deletion')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TombstoneQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'Tombstone'
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} @ {self.version}"
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from medications.models import Medications
+from patients.models import Emergencycontactdetails, Patients
+from .models import SyncCounter, Tombstone, mark_changed
+
+# Synced models and the name clients know them by
+SYNCED_MODELS = {
+    Patients: 'patients',
+    Medications: 'medications',
+}
+
+
+@receiver(post_delete, sender=Patients)
+@receiver(post_delete, sender=Medications)
+def record_tombstone(sender, instance, **kwargs):
+    with transaction.atomic():
+        Tombstone.objects.create(
+            model=SYNCED_MODELS[sender],
+            object_id=str(instance.pk),
+            version=SyncCounter.objects.allocate(),
+        )
+
+
+@receiver(post_save, sender=Emergencycontactdetails)
+@receiver(post_delete, sender=Emergencycontactdetails)
+def version_patient_contact(sender, instance, raw=False, **kwargs):
+    """The emergency contact is synced as part of its patient."""
+    if raw:
+        return
+    mark_changed(Patients.objects.filter(pk=instance.patient_number_id))
@@ -0,0 +1,109 @@
+import gzip
+import json
+from datetime import timedelta
+import brotli
+import msgpack
+from django.db.models import Q
+from django.utils import timezone
+from medications.models import DoseOccurrence, Medications
+from patients.models import Patients
+from .models import SyncCounter
+
+PATIENT_COLUMNS = (
+    'patient_number', 'first_name', 'middle_name', 'last_name', 'sex', 'age', 'date_of_birth',
+    'ward', 'room_number', 'bed_number', 'blood_group', 'diet', 'admitting_diagnosis',
+)
+MEDICATION_COLUMNS = (
+    'id', 'patient_number', 'schedule_id', 'physicianID', 'Medication_name', 'Medication_form',
+    'Medication_strength', 'Medication_unit', 'Medication_route', 'Medication_notes', 'Medication_Time',
+    'Medication_start_date', 'Medication_end_date', 'Frequency_type', 'Frequency',
+)
+DOSE_COLUMNS = ('id', 'medication', 'due_at')
+SNAPSHOT_HOURS = 24
+
+SNAPSHOT_FORMATS = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+# Preferred first when the client accepts several
+SNAPSHOT_ENCODINGS = {
+    'br': lambda body: brotli.compress(body, quality=9),
+    'gzip': lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+
+
+def _plain(value):
+    """Dates and times as ISO strings, durations as seconds."""
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return value.isoformat()
+
+
+def columnar(rows, columns):
+    """
+    Transposes ``values_list`` rows into ``{column: [values]}``, so field
+    names are sent once per table instead of once per row.
+    """
+    values = list(zip(*rows)) or [()] * len(columns)
+    return {column: [_plain(value) for value in column_values] for column, column_values in zip(columns, values)}
+
+
+def build_snapshot(now=None):
+    """
+    Returns the ward state a client needs to start: active patients, the
+    regimens they are on today or have a dose of in the window, and their
+    pending doses due in the next 24 hours (``due_at`` in epoch seconds), plus a /api/sync/ token to poll
+    from afterwards.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    # Read first: a change racing with the queries below is sent again by the next sync
+    token = SyncCounter.objects.token()
+
+    patients = Patients.objects.active().order_by('patient_number').values_list(*PATIENT_COLUMNS)
+    doses = [
+        (pk, medication_id, int(due_at.timestamp()))
+        for pk, medication_id, due_at in (
+            DoseOccurrence.objects.pending()
+            .filter(due_at__gte=now, due_at__lt=now + timedelta(hours=SNAPSHOT_HOURS))
+            .filter(medication__patient_number__is_archived=False)
+            .order_by('due_at')
+            .values_list('id', 'medication_id', 'due_at')
+        )
+    ]
+    # Every dose row's regimen is included, also one starting later in the window
+    medications = (
+        Medications.objects.of_active_patients()
+        .filter(
+            Q(Medication_start_date__lte=today, Medication_end_date__isnull=True)
+            | Q(Medication_start_date__lte=today, Medication_end_date__gte=today)
+            | Q(pk__in={medication_id for _, medication_id, _ in doses})
+        )
+        .order_by('id')
+        .values_list(*MEDICATION_COLUMNS)
+    )
+    return {
+        'token': str(token),
+        'generated_at': int(now.timestamp()),
+        'patients': columnar(patients, PATIENT_COLUMNS),
+        'medications': columnar(medications, MEDICATION_COLUMNS),
+        'doses': columnar(doses, DOSE_COLUMNS),
+    }
+
+
+def encode_snapshot(snapshot, output):
+    if output == 'msgpack':
+        return msgpack.packb(snapshot)
+    return json.dumps(snapshot, separators=(',', ':')).encode()
+
+
+def negotiate_encoding(accept_encoding):
+    """Returns the best compression the client accepts, or None."""
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in accept_encoding.split(',')
+        if not part.strip().endswith(';q=0')
+    }
+    return next((encoding for encoding in SNAPSHOT_ENCODINGS if encoding in accepted), None)
@@ -0,0 +1,174 @@
+import gzip
+import json
+from datetime import date, datetime, time, timedelta
+import brotli
+import msgpack
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from io import StringIO
+from rest_framework import status
+from rest_framework.test import APITestCase
+from medications.models import Medications
+from patients.models import Emergencycontactdetails, Patients
+from .models import SyncCounter, Tombstone
+
+
+class SyncTestCase(APITestCase):
+    """One patient on a once-daily regimen."""
+
+    def setUp(self):
+        cache.clear()
+        self.patient = Patients.objects.create(
+            first_name="Lina",
+            last_name="Cruz",
+            age=60,
+            sex='F',
+            contact_number=1234567890,
+            date_of_birth=date(1965, 1, 1),
+            room_number=201,
+        )
+        self.medication = Medications.objects.create(
+            physicianID="DOC-1",
+            Medication_name="Amlodipine",
+            Medication_strength=5,
+            Medication_Time=time(8, 0),
+            patient_number=self.patient,
+            Medication_start_date=timezone.localdate(),
+            Frequency_type='OD',
+        )
+
+
+class SyncTests(SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sync_url = reverse('sync')
+
+    def sync(self, since=None):
+        response = self.client.get(self.sync_url, {'since': since} if since is not None else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_returns_only_changes_since_token(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual([p['patient_number'] for p in data['patients']], [self.patient.pk])
+        self.assertEqual([m['id'] for m in data['medications']], [self.medication.pk])
+        token = data['token']
+
+        data = self.sync(token)
+        self.assertFalse(data['full'])
+        self.assertEqual((data['patients'], data['medications'], data['token']), ([], [], token))
+
+        Emergencycontactdetails.objects.create(
+            patient_number=self.patient, first_name="Rosa", relation_to_patient="Sister", contact_number="0917"
+        )
+        data = self.sync(token)
+        self.assertEqual([p['emergency_contact']['first_name'] for p in data['patients']], ["Rosa"])
+        self.assertEqual(data['medications'], [])
+        token = data['token']
+
+        self.client.post(
+            reverse('patients-bulk-archive'), {'patient_numbers': [self.patient.pk]}, format='json'
+        )
+        data = self.sync(token)
+        self.assertTrue(data['patients'][0]['is_archived'])
+        token = data['token']
+
+        self.client.delete(reverse('medications-detail', args=[self.patient.pk, self.medication.schedule_id]))
+        data = self.sync(token)
+        self.assertEqual(data['deleted'], {'patients': [], 'medications': [str(self.medication.pk)]})
+        self.assertEqual(self.sync(data['token'])['deleted']['medications'], [])
+
+    def test_pruned_token_gets_full_resync(self):
+        token = self.sync()['token']
+        self.medication.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=60))
+        call_command('prune_tombstones', '--days', '30', stdout=StringIO())
+
+        self.assertEqual(Tombstone.objects.count(), 0)
+        self.assertEqual(SyncCounter.objects.current().pruned_version, SyncCounter.objects.current().version)
+        data = self.sync(token)
+        self.assertTrue(data['full'])
+        self.assertEqual(data['medications'], [])
+
+    def test_version_taken_after_occurrence_regeneration(self):
+        self.medication.Frequency_type = 'BID'
+        with CaptureQueriesContext(connection) as queries:
+            self.medication.save()
+        statements = [query['sql'] for query in queries.captured_queries]
+        counter = next(i for i, sql in enumerate(statements) if '"SyncCounter"' in sql)
+        self.assertFalse(any('"DoseOccurrence"' in sql for sql in statements[counter:]))
+        self.assertEqual(
+            Medications.objects.get(pk=self.medication.pk).sync_version, SyncCounter.objects.current().version
+        )
+
+    def test_recording_a_dose_resends_the_regimen(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Medications.objects.filter(pk=self.medication.pk).update(Medication_start_date=yesterday)
+        token = self.sync()['token']
+        scheduled_time = timezone.make_aware(datetime.combine(yesterday, time(8, 0)))
+        response = self.client.post(
+            reverse('medications-administer', args=[self.patient.pk, self.medication.schedule_id]),
+            {'scheduled_time': scheduled_time.isoformat(), 'administered_by': 'RN-7'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        data = self.sync(token)
+        self.assertEqual([m['id'] for m in data['medications']], [self.medication.pk])
+        self.assertEqual(data['patients'], [])
+
+    def test_rejects_malformed_token(self):
+        response = self.client.get(self.sync_url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SnapshotTests(SyncTestCase):
+    def test_columnar_snapshot(self):
+        response = self.client.get(reverse('snapshot'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        snapshot = json.loads(gzip.decompress(response.content))
+        self.assertEqual(snapshot['patients']['patient_number'], [self.patient.pk])
+        self.assertEqual(snapshot['medications']['Medication_Time'], ['08:00:00'])
+        self.assertEqual(set(snapshot['doses']['medication']), {self.medication.pk})
+        self.assertEqual(snapshot['token'], str(SyncCounter.objects.token()))
+
+        response = self.client.get(
+            reverse('snapshot'), {'output': 'msgpack'}, HTTP_ACCEPT_ENCODING='gzip, br',
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        snapshot = msgpack.unpackb(brotli.decompress(response.content))
+        self.assertEqual(snapshot['medications']['Medication_name'], ["Amlodipine"])
+
+    def test_includes_regimen_starting_within_window(self):
+        later = Medications.objects.create(
+            physicianID="DOC-1",
+            Medication_name="Ceftriaxone",
+            Medication_strength=1,
+            Medication_Time=time(0, 0),
+            patient_number=self.patient,
+            Medication_start_date=timezone.localdate() + timedelta(days=1),
+            Medication_end_date=None,
+            Frequency_type='Other',
+            Frequency=timedelta(hours=6),
+        )
+        snapshot = json.loads(self.client.get(reverse('snapshot')).content)
+        self.assertIn(later.pk, snapshot['doses']['medication'])
+        self.assertTrue(set(snapshot['doses']['medication']) <= set(snapshot['medications']['id']))
+        self.assertIn(later.pk, snapshot['medications']['id'])
+
+    def test_conditional_request_and_invalidation(self):
+        etag = self.client.get(reverse('snapshot'))['ETag']
+        response = self.client.get(reverse('snapshot'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.patient.is_archived = True
+        self.patient.save()
+        response = self.client.get(reverse('snapshot'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        snapshot = json.loads(response.content)
+        self.assertEqual((snapshot['patients']['patient_number'], snapshot['doses']['id']), ([], []))
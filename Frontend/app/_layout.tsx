@@ -1,6 +1,7 @@
 import { Slot } from 'expo-router';
 import { SafeAreaProvider } from 'react-native-safe-area-context';
 import { useFonts } from 'expo-font';
+import '../replicapin';
 import { NotificationProvider } from '../notifcontext';
 import GlobalNotification from '../app/notification/globalnotif';
 import { Provider as PaperProvider } from 'react-native-paper'; // <-- Add this import
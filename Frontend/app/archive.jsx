@@ -23,17 +23,37 @@ export default function PatientsDirectory() {
   const router = useRouter();
   const [patients, setPatients] = useState([]);
   const [searchText, setSearchText] = useState("");
+  const [searchResults, setSearchResults] = useState([]);
   const [sortAscending, setSortAscending] = useState(true);
 
   useEffect(() => {
     fetchPatients();
   }, []);
 
+  // Searching is done by the API so the full list never has to be loaded
+  useEffect(() => {
+    const query = searchText.trim();
+    if (!query) {
+      setSearchResults([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `${BASE_API}/api/patients/search/?archived=true&q=${encodeURIComponent(query)}`
+        );
+        setSearchResults(response.ok ? await response.json() : []);
+      } catch (error) {
+        console.error("Error searching patients:", error);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchText]);
+
   const fetchPatients = async () => {
     try {
-      const response = await fetch(`${BASE_API}/api/patients/`);
-      const data = await response.json();
-      const archivedPatients = data.filter((patient) => patient.is_archived);
+      const response = await fetch(`${BASE_API}/api/patients/?archived=true`);
+      const archivedPatients = await response.json();
       setPatients(
         archivedPatients.length > 0 ? archivedPatients : [TESTING_PATIENT]
       );
@@ -53,14 +73,7 @@ export default function PatientsDirectory() {
   };
 
   // Filter + Sort
-  const filteredAndSortedPatients = [...patients].filter((patient) => {
-    const search = searchText.toLowerCase();
-    const name = `${patient.first_name ?? ""} ${patient.middle_name ?? ""} ${
-      patient.last_name ?? ""
-    }`.toLowerCase();
-    const id = (patient.patient_number + "").toLowerCase();
-    return id.includes(search) || name.includes(search);
-  });
+  const filteredAndSortedPatients = searchText.trim() ? searchResults : patients;
 
   patients.sort(
     (a, b) =>
@@ -90,7 +103,7 @@ export default function PatientsDirectory() {
             <View style={styles.searchSortContainer}>
               <TextInput
                 style={styles.searchInput}
-                placeholder="Search by name or patient number or date"
+                placeholder="Search by name, patient number, room or diagnosis"
                 placeholderTextColor="#666"
                 value={searchText}
                 onChangeText={setSearchText}
@@ -31,39 +31,29 @@ export default function CalendarApp() {
   const [medicationData, setMedicationData] = useState({});
   const router = useRouter();
 
-  // Fetch medication data for all patients
-  const fetchMedicationData = async () => {
+  // Fetch every dose of the displayed month, grouped by day, in one request
+  const fetchMedicationData = async (year, month) => {
   try {
-    const response = await fetch(`${BASE_API}/api/medications`);
+    const pad = (n) => String(n).padStart(2, "0");
+    const start = `${year}-${pad(month + 1)}-01`;
+    const end = `${year}-${pad(month + 1)}-${pad(getDaysInMonth(year, month))}`;
+    const response = await fetch(`${BASE_API}/api/medications/calendar/?start=${start}&end=${end}`);
     if (!response.ok) {
       throw new Error("Failed to fetch medication data");
     }
 
-    const data = await response.json();
+    const { days } = await response.json();
     const formattedData = {};
-    const patientNames = {};
 
-    for (const med of data) {
-      const medDate = med.next_dose_time?.split("T")[0];
-      if (!medDate) continue;
-      if (!patientNames[med.patient_number]) {
-        const patientResponse = await fetch(`${BASE_API}/api/patients/${med.patient_number}`);
-        const patientData = await patientResponse.json();
-        patientNames[med.patient_number] = `${patientData.first_name} ${patientData.last_name}`;
-      }
-
-      if (!formattedData[medDate]) {
-        formattedData[medDate] = [];
-      }
-
-      formattedData[medDate].push({
-        name: med.Medication_name,
-        time: med.next_dose_time?.split("T")[1]?.split("+")[0],
-        patientId: med.patient_number,
-        patientName: patientNames[med.patient_number],
-        scheduleId: med.schedule_id,
-        frequencyType: med.Frequency_type, 
-      });
+    for (const [medDate, doses] of Object.entries(days)) {
+      formattedData[medDate] = doses.map((dose) => ({
+        name: dose.Medication_name,
+        time: dose.time,
+        patientId: dose.patient_number,
+        patientName: `${dose.first_name} ${dose.last_name}`,
+        scheduleId: dose.schedule_id,
+        frequencyType: dose.Frequency_type,
+      }));
     }
     setMedicationData(formattedData);
   } catch (error) {
@@ -73,8 +63,8 @@ export default function CalendarApp() {
   
 
   useEffect(() => {
-    fetchMedicationData();
-  }, []);
+    fetchMedicationData(currentYear, currentMonth);
+  }, [currentYear, currentMonth]);
 
   const handleDatePress = (date) => {
     setSelectedDate(date);
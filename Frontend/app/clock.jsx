@@ -40,20 +40,63 @@ const AnalogClock = () => {
     }));
   };
 
-  const handleAdministerPress = (scheduleId) => {
+  // schedule_id is only unique within one patient
+  const alertKey = (alert) => `${alert.patient_number}:${alert.schedule_id}`;
+
+  const handleAdministerPress = async (alertId) => {
     // Try to find alert in upcoming or pending
     const alertToAdminister =
-      upcomingAlerts.find((a) => a.schedule_id === scheduleId) ||
-      pendingAlerts.find((a) => a.schedule_id === scheduleId);
+      upcomingAlerts.find((a) => alertKey(a) === alertId) ||
+      pendingAlerts.find((a) => alertKey(a) === alertId);
 
     if (!alertToAdminister) return; // nothing found
 
+    // Record the dose; retrying is safe, the server keeps one record per dose
+    try {
+      // The regimen's earliest pending dose from the last day up to an hour
+      // ahead, as the server has it now, rather than the next_dose_time
+      // loaded with this screen
+      const now = new Date();
+      const from = new Date(now.getTime() - 24 * 3600000).toISOString();
+      const to = new Date(now.getTime() + 3600000).toISOString();
+      const dosesResponse = await fetch(
+        `${BASE_API}/api/medications/upcoming/?from=${encodeURIComponent(from)}&to=${encodeURIComponent(to)}`
+      );
+      if (!dosesResponse.ok) {
+        console.error("Failed to fetch pending doses:", await dosesResponse.text());
+        return;
+      }
+      const dose = (await dosesResponse.json()).find((d) => alertKey(d) === alertId);
+      if (!dose) {
+        console.error("No pending dose to record for", alertId);
+        return;
+      }
+
+      const response = await fetch(
+        `${BASE_API}/api/medications/${dose.patient_number}/${dose.schedule_id}/administer/`,
+        {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            scheduled_time: dose.due_at,
+          }),
+        }
+      );
+      if (!response.ok) {
+        console.error("Failed to record administration:", await response.text());
+        return;
+      }
+    } catch (error) {
+      console.error("Failed to record administration:", error);
+      return;
+    }
+
     // Remove from upcoming and pending
     setUpcomingAlerts((prev) =>
-      prev.filter((alert) => alert.schedule_id !== scheduleId)
+      prev.filter((alert) => alertKey(alert) !== alertId)
     );
     setPendingAlerts((prev) =>
-      prev.filter((alert) => alert.schedule_id !== scheduleId)
+      prev.filter((alert) => alertKey(alert) !== alertId)
     );
 
     // Add to history with status administered
@@ -68,7 +111,7 @@ const AnalogClock = () => {
     // Check the alert
     setCheckedAlerts((prev) => ({
       ...prev,
-      [scheduleId]: true,
+      [alertId]: true,
     }));
   };
 
@@ -184,16 +227,16 @@ const AnalogClock = () => {
   const confirmCancellation = () => {
     // Try to find alert in upcoming or pending
     const cancelledAlert =
-      upcomingAlerts.find((a) => a.schedule_id === selectedCancelId) ||
-      pendingAlerts.find((a) => a.schedule_id === selectedCancelId);
+      upcomingAlerts.find((a) => alertKey(a) === selectedCancelId) ||
+      pendingAlerts.find((a) => alertKey(a) === selectedCancelId);
 
     if (cancelledAlert) {
       // Remove from upcoming and pending
       setUpcomingAlerts((prev) =>
-        prev.filter((a) => a.schedule_id !== selectedCancelId)
+        prev.filter((a) => alertKey(a) !== selectedCancelId)
       );
       setPendingAlerts((prev) =>
-        prev.filter((a) => a.schedule_id !== selectedCancelId)
+        prev.filter((a) => alertKey(a) !== selectedCancelId)
       );
 
       // Add to history with status cancelled and reason
@@ -282,16 +325,16 @@ const AnalogClock = () => {
                   <AppText style={styles.noAlerts}>No alerts</AppText>
                 ) : (
                   sortedAlerts.map((alert) => {
-                    const scheduleId = alert.schedule_id;
-                    const isExpanded = expandedAlerts[scheduleId];
+                    const alertId = alertKey(alert);
+                    const isExpanded = expandedAlerts[alertId];
                     return (
                       <TouchableOpacity
-                        key={scheduleId}
+                        key={alertId}
                         style={[
                           styles.alertItem,
                           getCardStyle(alert.Medication_Time),
                         ]}
-                        onPress={() => toggleExpand(scheduleId)}
+                        onPress={() => toggleExpand(alertId)}
                         activeOpacity={0.9}
                       >
                         <View style={{ flexDirection: "row", flex: 1 }}>
@@ -302,13 +345,13 @@ const AnalogClock = () => {
                                   ? alert.status === "administered"
                                     ? "checked"
                                     : "unchecked"
-                                  : checkedAlerts[scheduleId]
+                                  : checkedAlerts[alertId]
                                     ? "checked"
                                     : "unchecked"
                               }
                               onPress={null}
                               color={
-                                checkedAlerts[scheduleId] ? "#333" : "#CCCCCC"
+                                checkedAlerts[alertId] ? "#333" : "#CCCCCC"
                               }
                               style={styles.checkboxPosition}
                             />
@@ -363,7 +406,7 @@ const AnalogClock = () => {
                                           styles.confirmButton,
                                         ]}
                                         onPress={() =>
-                                          handleAdministerPress(scheduleId)
+                                          handleAdministerPress(alertId)
                                         }
                                       >
                                         <AppText style={styles.buttonText}>
@@ -376,7 +419,7 @@ const AnalogClock = () => {
                                           styles.cancelButton,
                                         ]}
                                         onPress={() =>
-                                          handleCancelPress(scheduleId)
+                                          handleCancelPress(alertId)
                                         }
                                       >
                                         <AppText style={styles.buttonText}>
@@ -32,18 +32,38 @@ export default function PatientsDirectory() {
   const [patients, setPatients] = useState([]);
   const [visibleMenu, setVisibleMenu] = useState(null);
   const [searchText, setSearchText] = useState("");
+  const [searchResults, setSearchResults] = useState([]);
   const [sortAscending, setSortAscending] = useState(true);
 
   useEffect(() => {
     fetchPatients();
   }, []);
 
+  // Searching is done by the API so the full list never has to be loaded
+  useEffect(() => {
+    const query = searchText.trim();
+    if (!query) {
+      setSearchResults([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `${BASE_API}/api/patients/search/?archived=false&q=${encodeURIComponent(query)}`
+        );
+        setSearchResults(response.ok ? await response.json() : []);
+      } catch (error) {
+        console.error("Error searching patients:", error);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchText]);
+
   const fetchPatients = async () => {
     try {
+      // The API lists active patients unless asked for archived ones
       const response = await fetch(`${BASE_API}/api/patients/`);
-      const data = await response.json();
-
-      const activePatients = data.filter((patient) => !patient.is_archived);
+      const activePatients = await response.json();
 
       setPatients(
         activePatients.length > 0 ? activePatients : [TESTING_PATIENT]
@@ -63,14 +83,7 @@ export default function PatientsDirectory() {
     }`;
   };
 
-  const filteredAndSortedPatients = [...patients].filter((patient) => {
-    const search = searchText.toLowerCase();
-    const name = `${patient.first_name ?? ""} ${patient.middle_name ?? ""} ${
-      patient.last_name ?? ""
-    }`.toLowerCase();
-    const id = (patient.patient_number + "").toLowerCase();
-    return id.includes(search) || name.includes(search);
-  });
+  const filteredAndSortedPatients = searchText.trim() ? searchResults : patients;
 
   patients.sort(
     (a, b) =>
@@ -101,7 +114,7 @@ export default function PatientsDirectory() {
           <View style={styles.searchSortContainer}>
             <TextInput
               style={styles.searchInput}
-              placeholder="Search by name or patient number"
+              placeholder="Search by name, patient number, room or diagnosis"
               placeholderTextColor="#666"
               value={searchText}
               onChangeText={setSearchText}
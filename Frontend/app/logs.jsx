@@ -51,6 +51,7 @@ const mockLogs = [
 export default function LogsScreen() {
   const router = useRouter();
   const [logs, setLogs] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [patients, setPatients] = useState([]);
   const [modalVisible, setModalVisible] = useState(false);
   const [selectedLog, setSelectedLog] = useState(null);
@@ -62,14 +63,15 @@ export default function LogsScreen() {
 
   const fetchData = async () => {
     try {
+      // Newest logs first, one page at a time
       const response = await fetch(`${BASE_API}/api/logs/`);
-      let logs = await response.json();
+      const page = await response.json();
 
-      const patientResponse = await fetch(`${BASE_API}/api/patients/`);
+      const patientResponse = await fetch(`${BASE_API}/api/patients/?archived=all`);
       let patients = await patientResponse.json();
 
-      logs = logs.sort((a, b) => a.log_id - b.log_id);
-      setLogs(logs);
+      setLogs(page.results);
+      setNextPage(page.next);
       setPatients(patients);
     } catch (error) {
       console.error("Error fetching logs:", error);
@@ -77,6 +79,18 @@ export default function LogsScreen() {
     }
   };
 
+  const fetchNextPage = async () => {
+    if (!nextPage) return;
+    try {
+      const response = await fetch(nextPage);
+      const page = await response.json();
+      setLogs((current) => [...current, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error("Error fetching more logs:", error);
+    }
+  };
+
   const handleViewPress = (log) => {
     setSelectedLog(log);
     setModalVisible(true);
@@ -119,6 +133,11 @@ export default function LogsScreen() {
               </View>
             ))
           )}
+          {nextPage && (
+            <TouchableOpacity style={styles.button} onPress={fetchNextPage}>
+              <AppText style={styles.buttonText}>Load more</AppText>
+            </TouchableOpacity>
+          )}
         </ScrollView>
 
 
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { View, Text, StyleSheet, TouchableOpacity, Modal } from "react-native";
+import { View, Text, StyleSheet, TouchableOpacity, Modal, TextInput } from "react-native";
 import Slider from "@react-native-community/slider";
 import Sidebar from "./components/sidebar";
 import Ionicons from "react-native-vector-icons/Ionicons";
@@ -13,6 +13,8 @@ import RNPickerSelect from "react-native-picker-select";
 export default function SettingsScreen() {
   const [volume, setVolume] = useState(50);
   const [alertSound, setAlertSound] = useState("alarm 1");
+  const [ward, setWard] = useState(""); // Ward this station gets alerts for, empty for all
+  const [rooms, setRooms] = useState(""); // Comma-separated room numbers, empty for all
   const [sidebarWidth, setSidebarWidth] = useState(70);
   const [isSaving, setIsSaving] = useState(false); // For showing loading state
   const [isSaved, setIsSaved] = useState(false); // To track if settings are saved
@@ -24,6 +26,8 @@ export default function SettingsScreen() {
       try {
         const storedVolume = await AsyncStorage.getItem("volume");
         const storedAlertSound = await AsyncStorage.getItem("alertSound");
+        const storedWard = await AsyncStorage.getItem("ward");
+        const storedRooms = await AsyncStorage.getItem("rooms");
 
         if (storedVolume !== null) {
           setVolume(JSON.parse(storedVolume));
@@ -31,6 +35,12 @@ export default function SettingsScreen() {
         if (storedAlertSound !== null) {
           setAlertSound(storedAlertSound);
         }
+        if (storedWard !== null) {
+          setWard(storedWard);
+        }
+        if (storedRooms !== null) {
+          setRooms(storedRooms);
+        }
       } catch (error) {
         console.error("Error loading settings from AsyncStorage:", error);
       }
@@ -47,6 +57,8 @@ export default function SettingsScreen() {
     try {
       await AsyncStorage.setItem("volume", JSON.stringify(volume));
       await AsyncStorage.setItem("alertSound", alertSound);
+      await AsyncStorage.setItem("ward", ward.trim());
+      await AsyncStorage.setItem("rooms", rooms.trim());
       setIsSaved(true);
     } catch (error) {
       console.error("Error saving settings:", error);
@@ -250,6 +262,30 @@ export default function SettingsScreen() {
           />
         </View>
 
+        {/* Alerts are limited to this station's ward and rooms from the next app start */}
+        <AppText style={[styles.label, { marginTop: 30 }]}>Station Ward</AppText>
+        <View style={styles.pickerWrapper}>
+          <TextInput
+            style={styles.picker}
+            value={ward}
+            onChangeText={setWard}
+            placeholder="All wards"
+            placeholderTextColor="#808080"
+          />
+        </View>
+
+        <AppText style={[styles.label, { marginTop: 30 }]}>Station Rooms</AppText>
+        <View style={styles.pickerWrapper}>
+          <TextInput
+            style={styles.picker}
+            value={rooms}
+            onChangeText={setRooms}
+            placeholder="All rooms, e.g. 101, 102"
+            placeholderTextColor="#808080"
+            keyboardType="numbers-and-punctuation"
+          />
+        </View>
+
           {/* Save Button */}
           <View style={styles.saveButtonWrapper}>
             <TouchableOpacity
@@ -13,7 +13,6 @@ export const NotificationProvider = ({ children }) => {
   const [volume, setVolume] = useState(100);
   const [alertSound, setAlertSound] = useState("alarm 1");
 
-  const patientsRef = useRef([]);
   const alertedAt60Min = useRef(new Set());
   const alertedAt30Min = useRef(new Set());
 
@@ -106,118 +105,237 @@ export const NotificationProvider = ({ children }) => {
     }
   };
 
-  const getPatientById = (id) => {
-    return patientsRef.current.find((p) => p.patient_number === id) || null;
-  };
-
   useEffect(() => {
     loadSettings();
+  }, []);
 
-    // Fetch patients ONCE
-    const fetchPatients = async () => {
-      try {
-        const response = await fetch(`${BASE_API}/api/patients/`);
-        const data = await response.json();
-        patientsRef.current = data;
-      } catch (error) {
-        console.error("Error fetching patient list:", error);
+  useEffect(() => {
+    let interval;
+
+    // The ward and rooms this station covers, from the settings screen;
+    // empty means every alert
+    const station = { ward: "", rooms: [] };
+    const atStation = (ward, room) =>
+      (!station.ward || ward === station.ward) &&
+      (station.rooms.length === 0 || station.rooms.includes(room));
+
+    // One notification per batch of alerts, as the sound plays once
+    const announce = async (upcoming) => {
+      if (upcoming.length > 1) {
+        showNotification({
+          multiple: true,
+          message: "Multiple upcoming medications scheduled.",
+          scheduleIds: upcoming.map((dose) => dose.medication_id),
+        });
+        await playAlertSound();
+      } else if (upcoming.length === 1) {
+        const dose = upcoming[0];
+        showNotification({
+          scheduleId: dose.medication_id,
+          medication: dose.Medication_name,
+          dosage_unit: dose.Medication_unit,
+          dosage: dose.Medication_strength,
+          room: dose.room_number,
+          route: dose.Medication_route,
+          notes: dose.Medication_notes,
+          form: dose.Medication_form,
+          physician: dose.physicianID,
+          dosage_time: dose.due_at.split("T")[1]?.split("+")[0]?.slice(0, 5),
+          patient_name: `${dose.last_name.toUpperCase()}, ${dose.first_name}`,
+        });
+        await playAlertSound();
       }
     };
 
-    fetchPatients();
-  }, []);
+    // Doses due in [from, to) shaped like /upcoming/ rows, from each
+    // regimen's next_dose_time; used when the occurrence endpoint fails
+    const fetchNextDoses = async (from, to) => {
+      const [medsResponse, patientsResponse] = await Promise.all([
+        fetch(`${BASE_API}/api/medications/`),
+        fetch(`${BASE_API}/api/patients/`),
+      ]);
+      const schedules = await medsResponse.json();
+      const patients = await patientsResponse.json();
+      const patientMap = {};
+      patients.forEach((p) => {
+        patientMap[p.patient_number] = p;
+      });
 
-  useEffect(() => {
-    let interval;
+      return schedules
+        .filter((sched) => {
+          if (!sched.next_dose_time) return false;
+          const patient = patientMap[sched.patient_number] || {};
+          if (!atStation(patient.ward, patient.room_number)) return false;
+          const dueAt = new Date(sched.next_dose_time);
+          return dueAt >= from && dueAt < to;
+        })
+        .map((sched) => {
+          const patient = patientMap[sched.patient_number] || {};
+          return {
+            ...sched,
+            id: `${sched.id}@${sched.next_dose_time}`,
+            medication_id: sched.id,
+            due_at: sched.next_dose_time,
+            first_name: patient.first_name || "",
+            last_name: patient.last_name || "Unknown",
+            room_number: patient.room_number,
+          };
+        });
+    };
 
     const fetchData = async () => {
       try {
-        const response = await fetch(`${BASE_API}/api/medications/`);
-        const schedules = await response.json();
-
+        // Only doses due 29–61 minutes from now; the server joins patient and room
         const now = new Date();
+        const from = new Date(now.getTime() + 29 * 60000);
+        const to = new Date(now.getTime() + 61 * 60000);
+        let doses;
+        try {
+          const ward = station.ward ? `&ward=${encodeURIComponent(station.ward)}` : "";
+          const response = await fetch(
+            `${BASE_API}/api/medications/upcoming/?from=${encodeURIComponent(from.toISOString())}&to=${encodeURIComponent(to.toISOString())}${ward}`
+          );
+          if (!response.ok) throw new Error(`HTTP ${response.status}`);
+          doses = (await response.json()).filter((dose) => atStation(station.ward, dose.room_number));
+        } catch (error) {
+          log("Upcoming doses unavailable, falling back to next dose times", String(error));
+          doses = await fetchNextDoses(from, to);
+        }
 
         const upcoming = [];
+        const inWindow = new Set(doses.map((dose) => dose.id));
 
-        schedules.forEach((sched) => {
-          const schedTime = new Date(sched.next_dose_time);
-          const diffMs = schedTime - now;
-          const diffMinutes = diffMs / (1000 * 60);
-          const scheduleId = sched.id;
+        // Forget doses that have left the window so the sets stay small
+        [alertedAt60Min, alertedAt30Min].forEach((alerted) => {
+          alerted.current.forEach((id) => {
+            if (!inWindow.has(id)) alerted.current.delete(id);
+          });
+        });
 
-          // Reset alert flags if dose time passed so next alerts can trigger
-          if (diffMinutes < 0) {
-            alertedAt60Min.current.delete(scheduleId);
-            alertedAt30Min.current.delete(scheduleId);
-            return;
-          }
+        doses.forEach((dose) => {
+          const diffMinutes = (new Date(dose.due_at) - now) / (1000 * 60);
+          const doseId = dose.id;
 
           // 60-minute alert
           if (
-            !alertedAt60Min.current.has(scheduleId) &&
+            !alertedAt60Min.current.has(doseId) &&
             diffMinutes >= 59 &&
             diffMinutes <= 61
           ) {
-            log(`⚠️ Triggering 60-minute alert for schedule ID ${scheduleId}`);
-            alertedAt60Min.current.add(scheduleId);
-            upcoming.push(sched);
+            log(`⚠️ Triggering 60-minute alert for dose ID ${doseId}`);
+            alertedAt60Min.current.add(doseId);
+            upcoming.push(dose);
             return;
           }
 
           // 30-minute alert
           if (
-            !alertedAt30Min.current.has(scheduleId) &&
+            !alertedAt30Min.current.has(doseId) &&
             diffMinutes >= 29 &&
             diffMinutes <= 31
           ) {
-            log(`⚠️ Triggering 30-minute alert for schedule ID ${scheduleId}`);
-            alertedAt30Min.current.add(scheduleId);
-            upcoming.push(sched);
+            log(`⚠️ Triggering 30-minute alert for dose ID ${doseId}`);
+            alertedAt30Min.current.add(doseId);
+            upcoming.push(dose);
             return;
           }
         });
 
-        if (upcoming.length > 1) {
-          showNotification({
-            multiple: true,
-            message: "Multiple upcoming medications scheduled.",
-            scheduleIds: upcoming.map((sched) => sched.id),
-          });
-          await playAlertSound();
-        } else if (upcoming.length === 1) {
-          const sched = upcoming[0];
-          const patient = getPatientById(sched.patient_number);
-          showNotification({
-            scheduleId: sched.id,
-            medication: sched.Medication_name,
-            dosage_unit: sched.Medication_unit,
-            dosage: sched.Medication_strength,
-            room: patient?.room_number,
-            route: sched.Medication_route,
-            notes: sched.notes,
-            form: sched.Medication_form,
-            physician: sched.physicianID,
-            dosage_time: sched.next_dose_time.split("T")[1]?.split("+")[0]?.slice(0, 5),
-            patient_name: patient ? `${patient.last_name.toUpperCase()}, ${patient.first_name}` : "Unknown",
-          });
-          await playAlertSound();
-        }
+        await announce(upcoming);
       } catch (error) {
         console.error("Error fetching medication schedules:", error);
       }
     };
 
-    const now = new Date();
-    const msUntilNextMinute = 60000 - (now.getTime() % 60000);
+    let timeout;
 
-    const timeout = setTimeout(() => {
-      fetchData();
-      interval = setInterval(fetchData, 60000);
-    }, msUntilNextMinute);
+    const startPolling = () => {
+      if (timeout || interval) return;
+      const now = new Date();
+      const msUntilNextMinute = 60000 - (now.getTime() % 60000);
 
-    return () => {
+      timeout = setTimeout(() => {
+        fetchData();
+        interval = setInterval(fetchData, 60000);
+      }, msUntilNextMinute);
+    };
+
+    const stopPolling = () => {
       clearTimeout(timeout);
       if (interval) clearInterval(interval);
+      timeout = null;
+      interval = null;
+    };
+
+    // The server pushes each alert as it falls due; polling only takes over
+    // where EventSource is missing (native builds) or while the stream is down
+    let source;
+    let batch = [];
+    let flushTimer;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        station.ward = (await AsyncStorage.getItem("ward")) || "";
+        station.rooms = ((await AsyncStorage.getItem("rooms")) || "")
+          .split(",")
+          .map((room) => parseInt(room, 10))
+          .filter((room) => !Number.isNaN(room));
+        log("Loaded station", station);
+      } catch (error) {
+        console.error("Error loading station:", error);
+      }
+      if (closed) return;
+
+      if (typeof EventSource === "undefined") {
+        startPolling();
+        return;
+      }
+
+      const params = new URLSearchParams();
+      if (station.ward) params.set("ward", station.ward);
+      if (station.rooms.length) params.set("room", station.rooms.join(","));
+      source = new EventSource(`${BASE_API}/api/medications/alerts/stream/?${params}`);
+
+      source.onopen = () => {
+        log("Alert stream connected");
+        stopPolling();
+        // Alerts pushed while the stream was down are not replayed; one
+        // poll picks up those still in their alert minute
+        fetchData();
+      };
+
+      source.onerror = () => {
+        log("Alert stream unavailable, polling instead");
+        startPolling();
+      };
+
+      source.addEventListener("dose-alert", (event) => {
+        const dose = JSON.parse(event.data);
+        const alerted = dose.lead_minutes === 60 ? alertedAt60Min : alertedAt30Min;
+        if (alerted.current.has(dose.id)) return;
+        log(`⚠️ ${dose.lead_minutes}-minute alert pushed for dose ID ${dose.id}`);
+        // Marked so a poll during a reconnect does not repeat it
+        alerted.current.add(dose.id);
+        setTimeout(() => alerted.current.delete(dose.id), 5 * 60000);
+
+        // Alerts of the same minute arrive one by one
+        batch.push(dose);
+        clearTimeout(flushTimer);
+        flushTimer = setTimeout(() => {
+          announce(batch);
+          batch = [];
+        }, 1000);
+      });
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      stopPolling();
+      clearTimeout(flushTimer);
+      if (source) source.close();
     };
   }, []);
 
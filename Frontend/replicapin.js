@@ -0,0 +1,25 @@
+import Constants from 'expo-constants';
+
+const BASE_API = Constants.expoConfig.extra.BASE_API;
+const PIN_HEADER = "X-MediSync-Primary";
+
+// The backend answers writes with a short-lived pin; sending it back on the
+// next requests keeps them on the primary database, so a screen reloaded
+// right after a save shows the change even while the replicas lag behind.
+let pin = null;
+const baseFetch = global.fetch;
+
+global.fetch = async (input, init = {}) => {
+  const url = typeof input === "string" ? input : input.url;
+  if (!BASE_API || !url.startsWith(BASE_API)) {
+    return baseFetch(input, init);
+  }
+
+  const headers = new Headers(init.headers || {});
+  if (pin) headers.set(PIN_HEADER, pin);
+  const response = await baseFetch(input, { ...init, headers });
+
+  const newPin = response.headers.get(PIN_HEADER);
+  if (newPin) pin = newPin;
+  return response;
+};